@@ -1,4 +1,20 @@
 __version__ = "0.0.4"
 
-from .config import ConfigUtil
-from .parse import DocCliParser
+__all__ = ["ConfigUtil", "DocCliParser"]
+
+
+def __getattr__(name):
+    # ConfigUtil and DocCliParser are imported on first use, so that importing
+    # one doesn't pull in the dependencies of the other
+    if name == "ConfigUtil":
+        from .config import ConfigUtil as value
+    elif name == "DocCliParser":
+        from .parse import DocCliParser as value
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
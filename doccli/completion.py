@@ -0,0 +1,121 @@
+import enum
+import pathlib
+import re
+import types
+import typing
+from typing import Any, Dict, List, Optional
+
+_HELP_OPTIONS = ["-h", "--help"]
+_SAFE_WORD = re.compile(r"^[^\s'\"`$\\]+$")
+
+
+def value_hint(annotation: Any) -> Optional[Dict]:
+    """Completion hint for an option's value, from its annotation
+
+    Args:
+        annotation (Any): Type annotation
+
+    Returns:
+        Optional[Dict]: `{"choices": [...]}`, `{"files": True}`, or None if the
+            value can't be completed
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin in (typing.Union, types.UnionType):
+        hints = [value_hint(a) for a in args if a is not type(None)]
+        return hints[0] if len(hints) == 1 else None
+    if origin is typing.Literal:
+        return {"choices": [str(a) for a in args]}
+    if annotation is bool:
+        return {"choices": ["true", "false"]}
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return {"choices": [str(m.value) for m in annotation]}
+    if isinstance(annotation, type) and issubclass(annotation, pathlib.PurePath):
+        return {"files": True}
+    return None
+
+
+def _function_name(prog: str) -> str:
+    return "_doccli_" + re.sub(r"[^A-Za-z0-9_]", "_", prog)
+
+
+def _words(words: List[str]) -> str:
+    return " ".join(w for w in words if _SAFE_WORD.match(w))
+
+
+def _value_cases(context: str, options: Dict[str, Optional[Dict]]) -> List[str]:
+    cases = []
+    for option, hint in options.items():
+        if not hint:
+            continue
+        if hint.get("files"):
+            reply = 'COMPREPLY=($(compgen -f -- "$cur"))'
+        else:
+            reply = f'COMPREPLY=($(compgen -W "{_words(hint["choices"])}" -- "$cur"))'
+        cases.append(f'        "{context}:{option}") {reply}; return;;')
+    return cases
+
+
+def completion_script(spec: Dict, shell: str = "bash", prog: str = None) -> str:
+    """Generate a standalone shell completion script from a completion spec
+    (see DocCliParser.completion_spec). The script doesn't run Python, so
+    completions are instant.
+
+    Args:
+        spec (Dict): Completion spec
+        shell (str): "bash" or "zsh"
+        prog (str, optional): Name of the executable to complete. Defaults to
+            the prog in spec
+
+    Returns:
+        str: Script to source in the shell
+    """
+    if shell not in ("bash", "zsh"):
+        raise ValueError(f"Unsupported shell `{shell}`, use bash or zsh")
+
+    prog = prog or spec["prog"]
+    func = _function_name(prog)
+    subcommands = spec.get("subcommands", {})
+
+    value_cases = _value_cases("", spec["options"])
+    for name, sub_spec in subcommands.items():
+        value_cases += _value_cases(name, sub_spec["options"])
+
+    top_words = _words(list(spec["options"]) + _HELP_OPTIONS + list(subcommands))
+    word_cases = [f'        "") COMPREPLY=($(compgen -W "{top_words}" -- "$cur"));;']
+    for name, sub_spec in subcommands.items():
+        sub_words = _words(list(sub_spec["options"]) + _HELP_OPTIONS)
+        word_cases.append(
+            f'        "{name}") COMPREPLY=($(compgen -W "{sub_words}" -- "$cur"));;'
+        )
+
+    lines = []
+    if shell == "zsh":
+        lines += ["autoload -U +X bashcompinit && bashcompinit", ""]
+    lines += [
+        f"{func}() {{",
+        "    local cur prev sub i",
+        '    cur="${COMP_WORDS[COMP_CWORD]}"',
+        '    prev="${COMP_WORDS[COMP_CWORD-1]}"',
+        '    sub=""',
+    ]
+    if subcommands:
+        lines += [
+            "    for ((i=1; i<COMP_CWORD; i++)); do",
+            '        case "${COMP_WORDS[i]}" in',
+            f'            {"|".join(subcommands)}) sub="${{COMP_WORDS[i]}}"; break;;',
+            "        esac",
+            "    done",
+        ]
+    if value_cases:
+        lines += ['    case "$sub:$prev" in', *value_cases, "    esac"]
+    lines += [
+        '    case "$sub" in',
+        *word_cases,
+        "    esac",
+        "}",
+        f"complete -F {func} {prog}",
+        "",
+    ]
+    return "\n".join(lines)
@@ -1,12 +1,54 @@
-import inspect
 import collections
-from typing import List, Dict, Type, TypeVar
+import functools
+import os
+from typing import TYPE_CHECKING, Any, Iterable, List, Dict, Tuple, Type, TypeVar
 
-import yaml
+# Anything beyond the standard library, and the rest of doccli, is imported
+# where it's used, so that `from doccli import ConfigUtil` stays cheap
+
+if TYPE_CHECKING:
+    import inspect
+
+    from .frozen import FrozenConfig
 
 
 T = TypeVar("T", bound="ConfigUtil")
 
+# Passed as _config_dict when re-running __init__ to keep the existing sub configs
+_KEEP_SUBCONFIGS = object()
+
+PATCH_PATH_SEPARATOR = "/"
+LOOKUP_PATH_SEPARATOR = "."
+
+# Attribute used to cache lookup indexes, which isn't part of the config
+_INDEX_ATTR = "_path_index"
+_MISSING = object()
+
+# Incremented whenever an attribute of any ConfigUtil object is set or deleted,
+# once the first lookup index has been built. An index is reused while the
+# generation it was built at is current
+_generation = 0
+
+
+def _setattr_tracking_generation(self, name, value):
+    global _generation
+    _generation += 1
+    object.__setattr__(self, name, value)
+
+
+def _delattr_tracking_generation(self, name):
+    global _generation
+    _generation += 1
+    object.__delattr__(self, name)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_parameters(kls) -> Tuple:
+    """inspect.signature(kls).parameters, cached per class"""
+    import inspect
+
+    return tuple(inspect.signature(kls).parameters.values())
+
 
 class ConfigUtil:
     config_key: str = None
@@ -14,12 +56,18 @@ class ConfigUtil:
     sub_config_list: List[T] = []
 
     def __init__(self, _config_dict={}, **kwargs):
+        if _config_dict is _KEEP_SUBCONFIGS:
+            self._ss = self.subconfigs
+            return
         self._ss = {}
         for ss in self.sub_config_list:
             self.subconfigs[ss.get_config_key()] = ss.with_config_dict(
                 _config_dict, **kwargs
             )
 
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != _INDEX_ATTR}
+
     @property
     def subconfigs(self):
         if hasattr(self, "_ss"):
@@ -43,6 +91,54 @@ class ConfigUtil:
         except KeyError:
             return missing
 
+    def _build_path_index(self) -> Dict[str, Any]:
+        if ConfigUtil.__setattr__ is not _setattr_tracking_generation:
+            # Attribute changes are only tracked once there is an index to
+            # invalidate, so objects that never use lookup aren't slowed down
+            ConfigUtil.__setattr__ = _setattr_tracking_generation
+            ConfigUtil.__delattr__ = _delattr_tracking_generation
+
+        index = {}
+        nodes = [("", self)]
+        while nodes:
+            prefix, node = nodes.pop()
+            for p in node._init_params():
+                if not p.name.startswith("_") and hasattr(node, p.name):
+                    index[prefix + p.name] = getattr(node, p.name)
+            for key, ss in node.subconfigs.items():
+                index[prefix + key] = ss
+                nodes.append((f"{prefix}{key}{LOOKUP_PATH_SEPARATOR}", ss))
+
+        self.__dict__[_INDEX_ATTR] = (_generation, index)
+        return index
+
+    def lookup(self, path: str, missing=_MISSING):
+        """Get a config value or sub config by its dotted path from this object,
+        e.g. `app.lookup("service.db.pool_size")` is `app["service"]["db"].pool_size`.
+
+        Paths are served from an index of the whole tree that is built on the
+        first lookup, and rebuilt after an attribute of any ConfigUtil object
+        is set or deleted. Changes made inside a mutable value (e.g. appending
+        to a list) are visible without a rebuild.
+
+        Args:
+            path (str): Sub config keys followed by a field name, joined by "."
+            missing (Any, optional): Returned if path doesn't exist. If not
+                given a KeyError is raised
+
+        Returns:
+            Any: The value or sub config at path
+        """
+        cached = self.__dict__.get(_INDEX_ATTR)
+        if cached is not None and cached[0] == _generation:
+            index = cached[1]
+        else:
+            index = self._build_path_index()
+        value = index.get(path, missing)
+        if value is _MISSING:
+            raise KeyError(path)
+        return value
+
     @classmethod
     def get_config_key(cls):
         return cls._get_config_key_repr(cls.config_key or cls.__name__)
@@ -70,11 +166,8 @@ class ConfigUtil:
         return {}
 
     def _convert_config_params(self) -> Dict:
-        class_sig = inspect.signature(self.__class__)
-        params = class_sig.parameters
-
         config_items = {}
-        for p in params.values():
+        for p in _get_parameters(self.__class__):
             if not p.name.startswith("_") and hasattr(self, p.name):
                 if getattr(self, p.name) != p.default:
                     config_items[p.name] = getattr(self, p.name)
@@ -105,32 +198,70 @@ class ConfigUtil:
 
         return config_items
 
-    def to_config_file(self, filename: str):
+    def to_config_file(self, filename: str, in_place: bool = False):
         """Converts a config object into a dictionary using to_config_dict, and then 
-        writes the contents to the relevant section, reading in the file first
+        writes the contents to the relevant section, reading in the file first.
+        `!include` values elsewhere in the file are written back unchanged
         
         Args:
             filename (str): Path to yml config file
+            in_place (bool): Only rewrite the text of this config's section, so
+                comments, ordering and formatting elsewhere in the file are kept.
+                Falls back to rewriting the whole file if the section uses flow
+                style
+
+        Raises:
+            IncludeError: If the section is in a file included by filename, or
+                the section's value contains `!include`, as writing it would
+                replace the include with inline values
         """
+        if in_place and os.path.exists(filename):
+            from .rewrite import update_section_in_place
+
+            config_dict = self.to_config_dict()
+            if update_section_in_place(filename, self.get_config_key(), config_dict):
+                return
+
+        from .loader import (
+            IncludeError,
+            dump_unresolved,
+            has_includes,
+            load_config_file,
+            load_unresolved,
+        )
+
         try:
-            with open(filename, "r+") as f:
-                contents = yaml.safe_load(f)
+            contents = load_unresolved(filename)
         except FileNotFoundError:
             contents = {}
 
         config_dict = self.to_config_dict()
-        sub_contents = self._get_sub_dict_by_key(self.get_config_key(), contents)
+        key = self.get_config_key()
+        sub_contents = self._get_sub_dict_by_key(key, contents)
         if not sub_contents:
-            contents.update(**config_dict)
-        else:
-            sub_contents.update(**config_dict)
+            if has_includes(contents) and self._get_sub_dict_by_key(
+                key, load_config_file(filename)
+            ):
+                raise IncludeError(
+                    f"`{key}` is defined in a file included by `{filename}`, "
+                    "write to that file instead"
+                )
+        target = sub_contents or contents
+        for k in config_dict:
+            if has_includes(target.get(k)):
+                raise IncludeError(
+                    f"`{k}` in `{filename}` uses !include, write to the included "
+                    "file instead"
+                )
+        target.update(**config_dict)
         with open(filename, "w+") as f:
-            contents = yaml.safe_dump(contents, f, default_flow_style=False)
+            dump_unresolved(contents, f)
 
     @classmethod
     def with_config_dict(cls: Type[T], config_dict: Dict, **kwargs) -> Type[T]:
         """Instantiate class from a ConfigUtil dictionary, with additional 
-        kwargs to fill in unprovided values
+        kwargs to fill in unprovided values. Values are converted to the
+        types annotated on __init__ (see doccli.convert.get_converter)
         
         Args:
             config_dict (Dict): Values matching config dict
@@ -142,11 +273,14 @@ class ConfigUtil:
         cls_config_dict.update(**kwargs)
 
         # Clean up cls_config_dict to match expected params
-        param_names = [p for p in inspect.signature(cls).parameters.keys()]
+        param_names = [p.name for p in _get_parameters(cls)]
         if "kwargs" not in param_names:
             cls_config_dict = {
                 k: v for k, v in cls_config_dict.items() if k in param_names
             }
+        from .convert import convert_params
+
+        cls_config_dict = convert_params(cls, cls_config_dict)
 
         if len(cls.sub_config_list) == 0:
             return cls(**cls_config_dict)
@@ -165,16 +299,227 @@ class ConfigUtil:
         at the top level - however it does keyscrape and could 
         break if the [[ config_key ]] is found as a key in a configurable
         parameter within the dictionary.
+
+        Values in the file can be written as `!include <path>` to pull in
+        the contents of another YML file (see doccli.loader.load_config_file).
         
         Args:
             filename (str): Path to config file
         """
+        from .loader import load_config_file
+
+        config_files = []
         try:
-            with open(filename, "r+") as f:
-                contents = yaml.safe_load(f)
+            contents = load_config_file(filename, files=config_files)
         except FileNotFoundError:
             contents = {}
+            config_files = [os.path.abspath(filename)]
 
         contents = cls._get_sub_dict_by_key(cls.get_config_key(), contents)
 
-        return cls.with_config_dict(contents, **kwargs)
+        obj = cls.with_config_dict(contents, **kwargs)
+        # Used by to_snapshot to detect when the config has changed
+        obj._config_files = config_files
+        obj._config_kwargs = kwargs
+        return obj
+
+    @classmethod
+    def json_schema(cls) -> Dict:
+        """JSON Schema for this class's config dict, laid out the same way as
+        to_config_dict. Built from the __init__ signature, annotations and
+        docstring, including the sub_config_list tree
+
+        Returns:
+            Dict: JSON Schema
+        """
+        from .schema import build_schema
+
+        return build_schema(cls)
+
+    @classmethod
+    def validate_configs(cls, sources: Iterable) -> Dict[Any, List[str]]:
+        """Check many config dicts or YML files against json_schema without
+        instantiating this class
+
+        Args:
+            sources (Iterable): Config dicts and/or paths to YML config files
+
+        Returns:
+            Dict[Any, List[str]]: Errors for each file path (or index for
+                dicts). Valid sources map to an empty list
+        """
+        from .schema import validate_configs
+
+        return validate_configs(cls, sources)
+
+    def to_snapshot(self, path: str):
+        """Write this object, including its sub configs, to a binary snapshot
+        that can be restored with from_snapshot without re-reading the YML
+        file. The hash of each config file this object was loaded from, and of
+        the kwargs it was loaded with (see with_config_file), is recorded so
+        that stale snapshots are ignored.
+
+        Snapshots are pickles, so only load snapshots that you wrote.
+
+        Args:
+            path (str): Path to snapshot file
+        """
+        from .snapshot import write_snapshot
+
+        write_snapshot(
+            self,
+            path,
+            getattr(self, "_config_files", []),
+            getattr(self, "_config_kwargs", {}),
+        )
+
+    @classmethod
+    def from_snapshot(cls: Type[T], path: str, filename: str = None, **kwargs) -> T:
+        """Restore an object written by to_snapshot. If the snapshot is
+        missing, invalid, was written with different kwargs, or any of its
+        config files have changed, the object is loaded with with_config_file
+        instead and the snapshot is rewritten.
+
+        Args:
+            path (str): Path to snapshot file
+            filename (str, optional): Config file to fall back to. Defaults to
+                the file recorded in the snapshot
+            kwargs: Values the object must have been loaded with. Passed to
+                with_config_file when falling back
+
+        Raises:
+            SnapshotClassError: If the snapshot is for another class
+
+        Returns:
+            cls: The restored class
+        """
+        from .snapshot import (
+            SnapshotClassError,
+            SnapshotError,
+            read_snapshot,
+            snapshot_sources,
+        )
+
+        try:
+            return read_snapshot(cls, path, kwargs)
+        except SnapshotClassError:
+            raise
+        except (FileNotFoundError, SnapshotError):
+            sources = snapshot_sources(path)
+            filename = filename or (sources[0] if sources else None)
+            if filename is None:
+                raise
+
+        obj = cls.with_config_file(filename, **kwargs)
+        obj.to_snapshot(path)
+        return obj
+
+    def _init_params(self) -> List["inspect.Parameter"]:
+        return [
+            p
+            for p in _get_parameters(self.__class__)
+            if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)
+            and p.name != "_config_dict"
+        ]
+
+    @classmethod
+    def _accepts_config_dict(cls) -> bool:
+        return any(
+            p.name == "_config_dict" or p.kind == p.VAR_KEYWORD
+            for p in _get_parameters(cls)
+        )
+
+    def _walk(self, path: str = None):
+        path = path or self.get_config_key()
+        yield path, self
+        for ss_key, ss in self.subconfigs.items():
+            yield from ss._walk(f"{path}{PATCH_PATH_SEPARATOR}{ss_key}")
+
+    @staticmethod
+    def diff(old: "ConfigUtil", new: "ConfigUtil") -> Dict[str, Dict]:
+        """Find the config values that differ between two objects of the same
+        class. Parameters that start with an underscore are ignored
+
+        Args:
+            old (ConfigUtil): Object to diff from
+            new (ConfigUtil): Object to diff to
+
+        Returns:
+            Dict[str, Dict]: Patch for apply_patch. Keys are the config_key path
+                of each changed (sub) config joined by "/", starting with the root,
+                e.g. "service/pool". Values map each changed field to its new value
+        """
+        if old.__class__ is not new.__class__:
+            raise ValueError(
+                f"Can't diff {old.__class__.__name__} and {new.__class__.__name__}"
+            )
+
+        new_nodes = dict(new._walk())
+        patch = {}
+        for path, old_node in old._walk():
+            new_node = new_nodes[path]
+            changes = {}
+            for p in old_node._init_params():
+                if p.name.startswith("_"):
+                    continue
+                old_value = getattr(old_node, p.name, p.default)
+                new_value = getattr(new_node, p.name, p.default)
+                if old_value != new_value:
+                    changes[p.name] = new_value
+            if changes:
+                patch[path] = changes
+        return patch
+
+    def apply_patch(self, patch: Dict[str, Dict]):
+        """Update this object tree in place with a patch created by diff. Only
+        the (sub) configs in the patch are re-initialised, with their current
+        values updated by the patch. Their existing sub configs are kept.
+
+        Args:
+            patch (Dict[str, Dict]): Patch from ConfigUtil.diff
+        """
+        nodes = dict(self._walk())
+        missing = [path for path in patch if path not in nodes]
+        if missing:
+            raise KeyError(f"Patch paths not found: {missing}")
+
+        # Parents first, so that patched children are re-initialised last
+        for path in sorted(patch, key=lambda p: p.count(PATCH_PATH_SEPARATOR)):
+            node = nodes[path]
+            params = {}
+            for p in node._init_params():
+                if hasattr(node, p.name):
+                    params[p.name] = getattr(node, p.name)
+                elif p.default is p.empty and p.name not in patch[path]:
+                    raise ValueError(
+                        f"Can't re-initialise `{path}`, `{p.name}` isn't stored"
+                    )
+            params.update(patch[path])
+
+            subconfigs = node.subconfigs
+            if node.sub_config_list and node._accepts_config_dict():
+                params["_config_dict"] = _KEEP_SUBCONFIGS
+            node.__init__(**params)
+            node._ss = subconfigs
+
+    def freeze(self) -> "FrozenConfig":
+        """Create an immutable, hashable view of this object tree. Lists, sets
+        and dicts are converted to tuples, frozensets and FrozenDicts, and
+        parameters that start with an underscore are left out.
+
+        Use FrozenConfig.share to pass the view to worker processes through
+        shared memory. Workers forked after share is called inherit the view
+        without copying or deserialising it.
+
+        Returns:
+            FrozenConfig: Frozen view
+        """
+        from .frozen import FrozenConfig, freeze_value
+
+        params = {
+            p.name: freeze_value(getattr(self, p.name))
+            for p in self._init_params()
+            if not p.name.startswith("_") and hasattr(self, p.name)
+        }
+        subconfigs = {key: ss.freeze() for key, ss in self.subconfigs.items()}
+        return FrozenConfig(self.__class__, params, subconfigs)
@@ -0,0 +1,268 @@
+import functools
+import inspect
+import types
+import typing
+from typing import Any, Callable, Dict
+
+_SCALAR_TYPES = (int, float, complex, str)
+_NONE_STRINGS = ("none", "null", "~")
+_TRUE_STRINGS = ("true", "t", "yes", "y", "on", "1")
+_FALSE_STRINGS = ("false", "f", "no", "n", "off", "0")
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+        raise ValueError(f"Can't interpret `{value}` as a bool")
+    return bool(value)
+
+
+def _to_int(value: Any) -> int:
+    # int() truncates floats and turns bools into 0 or 1, so reject anything
+    # that would lose information
+    if isinstance(value, bool):
+        raise ValueError(f"Can't convert `{value}` to int")
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"Can't convert `{value}` to int without losing precision")
+        return int(value)
+    return value if type(value) is int else int(value)
+
+
+# Converters for annotations that can't be inferred from the annotation itself.
+# Extend with register_converter
+_registry: Dict[Any, Callable] = {bool: _to_bool, Any: _identity}
+
+# Stricter replacements for scalar converters, used wherever a value may be a
+# native (e.g. YAML loaded) value rather than a CLI string
+_NATIVE_CONVERTERS = {int: _to_int}
+
+
+def _native(conv: Callable) -> Callable:
+    return _NATIVE_CONVERTERS.get(conv, conv)
+
+
+def _name_of(annotation: Any) -> str:
+    if isinstance(annotation, type) and not typing.get_args(annotation):
+        return annotation.__name__
+    return repr(annotation).replace("typing.", "")
+
+
+def _split_str(value: str) -> Any:
+    """CLI strings for containers can either be YAML flow style (`[1, 2]`,
+    `{a: 1}`) or comma separated (`1,2`, `a=1,b=2`)"""
+    stripped = value.strip()
+    if stripped.startswith(("[", "{")):
+        import yaml
+
+        return yaml.safe_load(stripped)
+    return [v.strip() for v in stripped.split(",") if v.strip()]
+
+
+def _compile_union(args) -> Callable:
+    optional = type(None) in args
+    members = [a for a in args if a is not type(None)]
+    convs = [_native(get_converter(a)) for a in members]
+    # Values that already have one of the union's types are left as they are
+    native_types = tuple(
+        a for a in members if isinstance(a, type) and not typing.get_args(a)
+    )
+
+    if len(convs) == 1:
+        (conv,) = convs
+    else:
+
+        def conv(value):
+            if native_types and isinstance(value, native_types):
+                return value
+            for c in convs:
+                try:
+                    return c(value)
+                except (TypeError, ValueError):
+                    continue
+            raise ValueError(f"`{value}` doesn't match any of {args}")
+
+    if not optional:
+        return conv
+
+    def convert_optional(value):
+        if value is None:
+            return None
+        if isinstance(value, str) and value.strip().lower() in _NONE_STRINGS:
+            return None
+        return conv(value)
+
+    return convert_optional
+
+
+def _compile_sequence(origin, args) -> Callable:
+    if origin is tuple and args and args[-1] is not Ellipsis:
+        # Fixed length tuple, e.g. Tuple[int, str]
+        convs = [_native(get_converter(a)) for a in args]
+
+        def convert_tuple(value):
+            if isinstance(value, str):
+                value = _split_str(value)
+            if len(value) != len(convs):
+                raise ValueError(f"Expected {len(convs)} values, got {len(value)}")
+            return tuple(c(v) for c, v in zip(convs, value))
+
+        return convert_tuple
+
+    elem = _native(get_converter(args[0])) if args else _identity
+
+    if elem is _identity:
+
+        def convert_sequence(value):
+            if isinstance(value, str):
+                value = _split_str(value)
+            return value if type(value) is origin else origin(value)
+
+    else:
+
+        def convert_sequence(value):
+            if isinstance(value, str):
+                value = _split_str(value)
+            return origin(map(elem, value))
+
+    return convert_sequence
+
+
+def _compile_mapping(args) -> Callable:
+    key_conv, val_conv = (
+        (_native(get_converter(args[0])), _native(get_converter(args[1])))
+        if args
+        else (_identity,) * 2
+    )
+
+    def convert_mapping(value):
+        if isinstance(value, str):
+            value = _split_str(value)
+            if isinstance(value, list):
+                value = dict(v.split("=", 1) for v in value)
+        return {key_conv(k): val_conv(v) for k, v in value.items()}
+
+    return convert_mapping
+
+
+def _compile(annotation: Any) -> Callable:
+    if annotation in _registry:
+        return _registry[annotation]
+
+    origin = typing.get_origin(annotation) or annotation
+    args = typing.get_args(annotation)
+
+    if origin in (typing.Union, types.UnionType):
+        conv = _compile_union(args)
+    elif origin in (list, tuple, set, frozenset):
+        conv = _compile_sequence(origin, args)
+    elif origin is dict:
+        conv = _compile_mapping(args)
+    elif isinstance(annotation, type):
+        # Plain classes (int, str, custom types...) are their own converter
+        return annotation
+    else:
+        return _identity
+
+    conv.__name__ = _name_of(annotation)
+    return conv
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_converter(annotation: Any) -> Callable:
+    return _compile(annotation)
+
+
+def get_converter(annotation: Any) -> Callable:
+    """Get the function that converts a value into the type given by annotation.
+    Converters are compiled once per annotation and cached. They accept
+    both CLI strings and native (e.g. YAML loaded) values, so `bool` understands
+    "False", and `List[int]` accepts "1,2", "[1, 2]" or [1, "2"]. Values that
+    already have one of the types of a Union are returned unchanged, and lossy
+    conversions of native values, e.g. 2.9 or True to int, raise ValueError.
+
+    Args:
+        annotation (Any): Type annotation
+
+    Returns:
+        Callable: Single argument converter
+    """
+    try:
+        return _cached_converter(annotation)
+    except TypeError:  # Unhashable, so can't be a type or registered
+        return _identity
+
+
+def register_converter(annotation: Any, func: Callable):
+    """Use func to convert values annotated with annotation, including
+    when annotation is nested in a container, e.g. List[annotation]
+
+    Args:
+        annotation (Any): Type annotation
+        func (Callable): Single argument converter
+    """
+    _registry[annotation] = func
+    _cached_converter.cache_clear()
+    get_param_converters.cache_clear()
+
+
+def _converts_native(conv: Callable) -> bool:
+    # Arbitrary classes are only trusted to parse CLI strings, so loaded values
+    # are passed through to them unchanged
+    if isinstance(conv, type):
+        return conv in _SCALAR_TYPES
+    return conv is not _identity
+
+
+@functools.lru_cache(maxsize=None)
+def get_param_converters(kls) -> Dict[str, Callable]:
+    """Converters for each annotated config parameter of a class's __init__,
+    used for values that didn't come from the CLI. Parameters starting with an
+    underscore are skipped
+
+    Args:
+        kls (class): Class to inspect
+
+    Returns:
+        Dict[str, Callable]: Parameter name to converter
+    """
+    converters = {}
+    for p in inspect.signature(kls).parameters.values():
+        if p.name.startswith("_") or p.annotation is inspect._empty:
+            continue
+        conv = get_converter(p.annotation)
+        if _converts_native(conv):
+            converters[p.name] = _native(conv)
+    return converters
+
+
+def convert_params(kls, params: Dict) -> Dict:
+    """Convert the values in params to the types annotated on kls.__init__.
+    None values are left alone
+
+    Args:
+        kls (class): Class whose __init__ annotations are used
+        params (Dict): Parameter values, keyed by name
+
+    Returns:
+        Dict: Converted copy of params
+    """
+    converters = get_param_converters(kls)
+    converted = {}
+    for k, v in params.items():
+        conv = converters.get(k)
+        if conv is None or v is None or (conv in _SCALAR_TYPES and type(v) is conv):
+            converted[k] = v
+        else:
+            converted[k] = conv(v)
+    return converted
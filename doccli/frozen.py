@@ -0,0 +1,247 @@
+import collections
+import pickle
+from typing import Any, Dict, Iterator
+
+
+class FrozenDict(collections.abc.Mapping):
+    """Immutable, hashable dict"""
+
+    __slots__ = ("_d", "_hash")
+
+    def __init__(self, *args, **kwargs):
+        object.__setattr__(self, "_d", dict(*args, **kwargs))
+        object.__setattr__(self, "_hash", None)
+
+    def __getitem__(self, key):
+        return self._d[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._d)
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(frozenset(self._d.items())))
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __reduce__(self):
+        return (self.__class__, (self._d,))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._d!r})"
+
+
+def freeze_value(value: Any) -> Any:
+    """Recursively convert lists, sets, dicts and ConfigUtil objects into
+    their immutable equivalents"""
+    if hasattr(value, "freeze") and hasattr(value, "subconfigs"):
+        return value.freeze()
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_value(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze_value(v) for v in value)
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze_value(v)) for k, v in value.items())
+    return value
+
+
+def thaw_value(value: Any) -> Any:
+    """Reverse freeze_value, turning tuples into lists"""
+    if isinstance(value, FrozenConfig):
+        return value.thaw()
+    if isinstance(value, tuple):
+        return [thaw_value(v) for v in value]
+    if isinstance(value, frozenset):
+        return {thaw_value(v) for v in value}
+    if isinstance(value, FrozenDict):
+        return {k: thaw_value(v) for k, v in value.items()}
+    return value
+
+
+class FrozenConfig:
+    """Immutable, hashable view of a ConfigUtil object tree, created with
+    ConfigUtil.freeze. Config values are available as attributes, and sub
+    configs through indexing, as with ConfigUtil. Parameters starting with an
+    underscore aren't included
+    """
+
+    __slots__ = ("_cls", "_params", "_ss", "_hash")
+
+    def __init__(self, cls, params: Dict, subconfigs: Dict):
+        object.__setattr__(self, "_cls", cls)
+        object.__setattr__(self, "_params", FrozenDict(params))
+        object.__setattr__(self, "_ss", FrozenDict(subconfigs))
+        object.__setattr__(self, "_hash", None)
+
+    @property
+    def config_class(self):
+        return self._cls
+
+    @property
+    def params(self) -> FrozenDict:
+        return self._params
+
+    @property
+    def subconfigs(self) -> FrozenDict:
+        return self._ss
+
+    def get_config_key(self) -> str:
+        return self._cls.get_config_key()
+
+    def __getattr__(self, name):
+        try:
+            return self._params[name]
+        except KeyError:
+            raise AttributeError(
+                f"`{self._cls.__name__}` has no config value `{name}`"
+            ) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __getitem__(self, item):
+        try:
+            return self._ss[item]
+        except KeyError:
+            return self._ss[self._cls._get_config_key_repr(item)]
+
+    def get(self, item, missing=None):
+        try:
+            return self[item]
+        except KeyError:
+            return missing
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FrozenConfig):
+            return NotImplemented
+        return (self._cls, self._params, self._ss) == (
+            other._cls,
+            other._params,
+            other._ss,
+        )
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self._cls, self._params, self._ss)))
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self._cls, self._params._d, self._ss._d))
+
+    def __repr__(self) -> str:
+        return f"FrozenConfig({self._cls.__name__}, {dict(self._params)!r})"
+
+    def to_config_dict(self) -> Dict:
+        """Render as a mutable dict, in the same layout as
+        ConfigUtil.to_config_dict
+
+        Returns:
+            Dict: Object rendered as dict
+        """
+        key = self.get_config_key()
+        config_items = {key: {k: thaw_value(v) for k, v in self._params.items()}}
+        for ss in self._ss.values():
+            if self._cls.flatten_sub_configs:
+                config_items.update(**ss.to_config_dict())
+            else:
+                config_items[key].update(**ss.to_config_dict())
+        return config_items
+
+    def thaw(self, **kwargs):
+        """Create a new, mutable, ConfigUtil object from this view
+
+        Args:
+            kwargs: Values for parameters that aren't part of the frozen view,
+                e.g. ones starting with an underscore
+
+        Returns:
+            ConfigUtil: New object
+        """
+        return self._cls.with_config_dict(self.to_config_dict(), **kwargs)
+
+    def share(self) -> "SharedConfig":
+        """Serialise this view once into shared memory. See SharedConfig"""
+        return SharedConfig(self)
+
+
+# Configs already loaded from shared memory in this process, by block name
+_attached: Dict[str, FrozenConfig] = {}
+
+
+def _attach_shared_config(name: str, size: int) -> "SharedConfig":
+    handle = SharedConfig.__new__(SharedConfig)
+    handle.name, handle.size, handle._shm = name, size, None
+    return handle
+
+
+class SharedConfig:
+    """Handle to a FrozenConfig serialised into a shared memory block.
+
+    The handle pickles to just the block's name, so it can be passed with
+    every task to a ProcessPoolExecutor or multiprocessing.Pool started by the
+    process that created it. Each worker process deserialises the config the
+    first time it calls get(), and reuses it for every later task. Forked
+    workers inherit the config and never need to read the block. The process
+    that created the handle owns the block and should call unlink() (or use
+    it as a context manager) once the workers are done.
+    """
+
+    def __init__(self, frozen: FrozenConfig):
+        from multiprocessing import shared_memory
+
+        data = pickle.dumps(frozen, protocol=pickle.HIGHEST_PROTOCOL)
+        self._shm = shared_memory.SharedMemory(create=True, size=len(data))
+        self._shm.buf[: len(data)] = data
+        self.name = self._shm.name
+        self.size = len(data)
+        _attached[self.name] = frozen
+
+    def get(self) -> FrozenConfig:
+        """Get the frozen config, loading it from shared memory once per process
+
+        Returns:
+            FrozenConfig: The shared config
+        """
+        frozen = _attached.get(self.name)
+        if frozen is None:
+            from multiprocessing import shared_memory
+
+            try:
+                shm = shared_memory.SharedMemory(name=self.name, track=False)
+            except TypeError:
+                # Before Python 3.13 attaching always registers the block with
+                # the resource tracker, which child processes share with the
+                # process that created it
+                shm = shared_memory.SharedMemory(name=self.name)
+            try:
+                frozen = pickle.loads(shm.buf[: self.size])
+            finally:
+                shm.close()
+            _attached[self.name] = frozen
+        return frozen
+
+    def unlink(self):
+        """Free the shared memory block. Only call this from the process that
+        created the handle"""
+        _attached.pop(self.name, None)
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __reduce__(self):
+        return (_attach_shared_config, (self.name, self.size))
+
+    def __enter__(self) -> "SharedConfig":
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
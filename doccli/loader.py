@@ -0,0 +1,177 @@
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+import yaml
+
+
+class IncludeError(ValueError):
+    """Raised when an !include reference can't be resolved"""
+
+
+class _Include:
+    def __init__(self, path: str):
+        self.path = path
+
+
+class _IncludeLoader(yaml.SafeLoader):
+    pass
+
+
+def _construct_include(loader: _IncludeLoader, node: yaml.Node) -> _Include:
+    return _Include(loader.construct_scalar(node))
+
+
+_IncludeLoader.add_constructor("!include", _construct_include)
+
+
+class _IncludeDumper(yaml.SafeDumper):
+    pass
+
+
+def _represent_include(dumper: _IncludeDumper, data: _Include) -> yaml.Node:
+    return dumper.represent_scalar("!include", data.path)
+
+
+_IncludeDumper.add_representer(_Include, _represent_include)
+
+# Parsed fragments keyed by (st_dev, st_ino), storing the (mtime, size) they were
+# parsed at so that edited files are picked up again
+_fragment_cache: Dict[Tuple, Tuple] = {}
+_fragment_lock = threading.Lock()
+
+
+def _collect_includes(node: Any, base_dir: str, includes: List[_Include]):
+    if isinstance(node, _Include):
+        node.path = os.path.normpath(os.path.join(base_dir, node.path))
+        includes.append(node)
+    elif isinstance(node, dict):
+        for val in node.values():
+            _collect_includes(val, base_dir, includes)
+    elif isinstance(node, list):
+        for val in node:
+            _collect_includes(val, base_dir, includes)
+
+
+def _load_fragment(filename: str) -> Tuple[Tuple, Any, List[_Include]]:
+    st = os.stat(filename)
+    ident, version = (st.st_dev, st.st_ino), (st.st_mtime_ns, st.st_size)
+
+    with _fragment_lock:
+        cached = _fragment_cache.get(ident)
+    if cached and cached[0] == version:
+        return (ident,) + cached[1:]
+
+    with open(filename, "r") as f:
+        contents = yaml.load(f, Loader=_IncludeLoader)
+    includes = []
+    _collect_includes(contents, os.path.dirname(filename), includes)
+
+    with _fragment_lock:
+        _fragment_cache[ident] = (version, contents, includes)
+    return ident, contents, includes
+
+
+def _resolve(node: Any, fragments: Dict, stack: Tuple) -> Any:
+    if isinstance(node, _Include):
+        ident, contents = fragments[node.path]
+        if ident in stack:
+            raise IncludeError(f"Circular !include of `{node.path}`")
+        return _resolve(contents, fragments, stack + (ident,))
+    if isinstance(node, dict):
+        return {k: _resolve(v, fragments, stack) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_resolve(v, fragments, stack) for v in node]
+    return node
+
+
+def load_unresolved(filename: str) -> Any:
+    """Load a YML config file, keeping each `!include <path>` value as a
+    placeholder that dump_unresolved writes back out unchanged
+
+    Args:
+        filename (str): Path to YML config file
+
+    Returns:
+        Any: Parsed file contents
+    """
+    with open(filename, "r") as f:
+        return yaml.load(f, Loader=_IncludeLoader)
+
+
+def dump_unresolved(contents: Any, stream):
+    """Write contents loaded by load_unresolved as YML, including its
+    `!include` values
+
+    Args:
+        contents (Any): Contents to write
+        stream (TextIO): Stream to write to
+    """
+    yaml.dump(contents, stream, Dumper=_IncludeDumper, default_flow_style=False)
+
+
+def has_includes(contents: Any) -> bool:
+    """Whether contents loaded by load_unresolved has any `!include` values"""
+    if isinstance(contents, _Include):
+        return True
+    if isinstance(contents, dict):
+        return any(has_includes(v) for v in contents.values())
+    if isinstance(contents, list):
+        return any(has_includes(v) for v in contents)
+    return False
+
+
+def clear_cache():
+    """Drop all memoized fragments"""
+    with _fragment_lock:
+        _fragment_cache.clear()
+
+
+def load_config_file(filename: str, files: List[str] = None) -> Any:
+    """Load a YML config file, replacing any `!include <path>` values with the
+    contents of the referenced file. Paths are relative to the including file.
+
+    Includes are discovered level by level, and every file on a level is read
+    in parallel. Each fragment is parsed once per process and memoized by file
+    identity, so a fragment shared between many files is only parsed once.
+
+    Args:
+        filename (str): Path to YML config file
+        files (List[str], optional): If given, the absolute path of every file
+            that was read is appended to it, starting with filename
+
+    Raises:
+        FileNotFoundError: If filename doesn't exist
+        IncludeError: If an included file is missing, or includes are circular
+
+    Returns:
+        Any: Parsed file contents
+    """
+    root = os.path.abspath(filename)
+    root_ident, root_contents, includes = _load_fragment(root)
+    fragments = {root: (root_ident, root_contents)}
+
+    pending = list(dict.fromkeys(inc.path for inc in includes))
+    if pending:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor() as pool:
+            while pending:
+                try:
+                    results = list(pool.map(_load_fragment, pending))
+                except FileNotFoundError as e:
+                    raise IncludeError(
+                        f"Included file `{e.filename}` does not exist"
+                    ) from e
+
+                next_pending = {}
+                for path, (ident, contents, includes) in zip(pending, results):
+                    fragments[path] = (ident, contents)
+                    for inc in includes:
+                        if inc.path not in fragments:
+                            next_pending[inc.path] = None
+                pending = list(next_pending)
+
+    if files is not None:
+        files.extend(fragments)
+    return _resolve(root_contents, fragments, (root_ident,))
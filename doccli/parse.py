@@ -1,16 +1,28 @@
 import argparse
 import copy
-import inspect
+import json
 import logging
 import re
 import sys
-from typing import List, Dict, Type, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    Dict,
+    Optional,
+    Type,
+    TypeVar,
+)
 
-import yaml
 from decli import cli
 from docstring_parser import parse
 
-from . import ConfigUtil
+from .config import ConfigUtil, _get_parameters
+from .convert import _identity, get_converter
+
+if TYPE_CHECKING:
+    import inspect
 
 
 class DocCliParser:
@@ -20,20 +32,95 @@ class DocCliParser:
         Args:
             cls (class): Class to render as cli
         """
-        spec = self.create_decli_spec(cls)
-        self.spec = spec
+        self._cls = cls
+        self._spec = self.create_decli_spec(cls)
 
         self._mainkey = (
-            self.spec["prog"] if not issubclass(cls, ConfigUtil) else cls.config_key
+            self._spec["prog"] if not issubclass(cls, ConfigUtil) else cls.config_key
         )
         self._subcmd_config_map = {}
 
+        # Subcommand specs and parsers are only built when they're needed
+        self._subcmd_classes = {}
+        self._subcmd_specs = {}
+        self._subcmd_parsers = {}
+        self._spec_complete = True
+        self._parser = None
+
+    @property
+    def spec(self) -> Dict:
+        """Decli spec, including every subcommand"""
+        if not self._spec_complete:
+            self._spec["subcommands"]["commands"] = [
+                self._get_subcommand_spec(name) for name in self._subcmd_classes
+            ]
+            self._spec_complete = True
+        return self._spec
+
     @property
     def parser(self) -> argparse.ArgumentParser:
-        return cli(self.spec)
+        """Full parser, including every subcommand. Built once, and rebuilt
+        after add_subcommand"""
+        if self._parser is None:
+            self._parser = cli(self.spec)
+        return self._parser
 
     def parse_args(self, argv=None):
-        return self.parser.parse_args(argv)
+        """Parse argv (sys.argv by default). If argv selects a subcommand then
+        only the parser for that subcommand is built, otherwise the full parser
+        (e.g. for top level --help) is used
+        
+        Args:
+            argv (List[str], optional): Arguments to parse
+        """
+        argv = sys.argv[1:] if argv is None else argv
+        sub_cmd = self._find_subcommand(argv)
+        if sub_cmd is None:
+            return self.parser.parse_args(argv)
+        return self._get_subcommand_parser(sub_cmd).parse_args(argv)
+
+    def _find_subcommand(self, argv: List[str]) -> Optional[str]:
+        """Cheaply find the subcommand selected by argv, skipping over top level
+        options and their values. Returns None when the full parser is needed"""
+        if not self._subcmd_classes:
+            return None
+
+        options = [arg["name"] for arg in self._spec.get("arguments", [])]
+        skip_value = False
+        for arg in argv:
+            if skip_value:
+                skip_value = False
+            elif arg == "--" or (len(arg) > 2 and "--help".startswith(arg)):
+                return None
+            elif arg.startswith("-"):
+                if arg == "-h":
+                    return None
+                if "=" not in arg:
+                    matches = [o for o in options if o.startswith(arg)]
+                    skip_value = arg in options or len(matches) == 1
+            else:
+                return arg if arg in self._subcmd_classes else None
+        return None
+
+    def _get_subcommand_spec(self, name: str) -> Dict:
+        if name not in self._subcmd_specs:
+            cls, func = self._subcmd_classes[name]
+            sub_spec = self.create_decli_spec(cls)
+            sub_spec["name"] = sub_spec.pop("prog")
+            sub_spec["help"] = sub_spec.pop("description")
+            if func:
+                sub_spec["func"] = func
+            self._subcmd_specs[name] = sub_spec
+        return self._subcmd_specs[name]
+
+    def _get_subcommand_parser(self, name: str) -> argparse.ArgumentParser:
+        if name not in self._subcmd_parsers:
+            spec = dict(self._spec)
+            spec["subcommands"] = dict(
+                self._spec["subcommands"], commands=[self._get_subcommand_spec(name)]
+            )
+            self._subcmd_parsers[name] = cli(spec)
+        return self._subcmd_parsers[name]
 
     @staticmethod
     def _check_dict_for_params(d: Dict, param_names: List[str]) -> List[str]:
@@ -54,15 +141,30 @@ class DocCliParser:
         for param, value in available_params.items():
             if param not in argv:
                 argv.insert(index, param)
-                argv.insert(index + 1, str(value))
+                argv.insert(index + 1, DocCliParser._format_param_value(value))
         return argv
 
+    @staticmethod
+    def _format_param_value(value) -> str:
+        # Containers are written in flow style so that their converters can
+        # read them back in
+        if isinstance(value, (list, tuple, set, frozenset, dict)):
+            if isinstance(value, (set, frozenset)):
+                value = list(value)
+            try:
+                return json.dumps(value)
+            except TypeError:
+                pass
+        return str(value)
+
     def _parse_args_with_config_file(self, args: List[str], filename: str) -> List[str]:
-        with open(filename, "r+") as f:
-            contents = yaml.safe_load(f)
+        from .loader import load_config_file
+
+        return self._add_config_to_args(args, load_config_file(filename))
 
+    def _add_config_to_args(self, args: List[str], contents: Dict) -> List[str]:
         # Add variables from Prog section
-        params = [d["name"] for d in self.spec.get("arguments", dict())]
+        params = [d["name"] for d in self._spec.get("arguments", dict())]
         config_params = ConfigUtil._get_sub_dict_by_key(self._mainkey, contents)
         if not config_params:
             config_params = contents
@@ -77,8 +179,7 @@ class DocCliParser:
             if sub_cmd in args:  # Get any unprovided args from the config file
                 params = [
                     arg["name"]
-                    for d in self.spec["subcommands"]["commands"]
-                    for arg in d["arguments"]
+                    for arg in self._get_subcommand_spec(sub_cmd).get("arguments", [])
                 ]
 
                 config_params = ConfigUtil._get_sub_dict_by_key(config_name, contents)
@@ -94,17 +195,153 @@ class DocCliParser:
 
         return args
 
-    def parse_args_with_config_file(self, filename: str):
+    def parse_args_with_config_file(self, filename: str, argv: List[str] = None):
         """Adds any missing arguments for a given specification 
         from a YML config file. This assumes that positional 
-        args are always located after keyword args
+        args are always located after keyword args. The config file
+        may use `!include <path>` to pull in other YML files
         
         Args:
             filename (str): Path to YML config file
+            argv (List[str], optional): Arguments to parse. Defaults to sys.argv
         """
-        args = copy.deepcopy(sys.argv[1:])
+        args = copy.deepcopy(sys.argv[1:] if argv is None else argv)
         args = self._parse_args_with_config_file(args, filename)
-        return self.parser.parse_args(args)
+        return self.parse_args(args)
+
+    def parse_many(
+        self, argv_iter: Iterable[List[str]], config_file: str = None
+    ) -> Iterator[argparse.Namespace]:
+        """Parse a stream of argument lists, reusing the same parsers and
+        (if given) the same parsed config file for all of them. As with
+        parse_args, invalid arguments raise SystemExit
+        
+        Args:
+            argv_iter (Iterable[List[str]]): Argument lists to parse
+            config_file (str, optional): YML config file used to fill in
+                missing arguments, as in parse_args_with_config_file
+        
+        Yields:
+            argparse.Namespace: Parsed arguments for each argument list
+        """
+        contents = self._load_config(config_file)
+        for argv in argv_iter:
+            argv = list(argv)
+            if contents is not None:
+                argv = self._add_config_to_args(argv, contents)
+            yield self.parse_args(argv)
+
+    @staticmethod
+    def _load_config(config_file: Optional[str]) -> Optional[Dict]:
+        if not config_file:
+            return None
+        from .loader import load_config_file
+
+        return load_config_file(config_file)
+
+    def _handle_request(self, line: str, contents: Optional[Dict]) -> Dict:
+        import contextlib
+        import io
+        import shlex
+
+        line = line.strip()
+        try:
+            argv = json.loads(line) if line.startswith("[") else shlex.split(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"Invalid request: {e}"}
+
+        # argparse writes errors and --help to stderr/stdout before exiting
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stderr(output), contextlib.redirect_stdout(
+                output
+            ):
+                if contents is not None:
+                    argv = self._add_config_to_args(argv, contents)
+                args = self.parse_args(argv)
+        except SystemExit:
+            return {"ok": False, "error": output.getvalue().strip()}
+
+        params = vars(args)
+        func = params.pop("func", None)
+        if func is None:
+            return {"ok": False, "error": "No subcommand function to run"}
+
+        # Anything func prints is returned with the response, so that it can't
+        # break up the stream of responses
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stderr(output), contextlib.redirect_stdout(
+                output
+            ):
+                response = {"ok": True, "result": func(**params)}
+        except SystemExit as e:
+            response = {"ok": False, "error": f"Exited with status {e.code}"}
+        except Exception as e:
+            logging.exception(f"Request `{line}` failed")
+            response = {"ok": False, "error": f"{e.__class__.__name__}: {e}"}
+        if output.getvalue():
+            response["output"] = output.getvalue()
+        return response
+
+    def serve(self, stdin=None, stdout=None, config_file: str = None):
+        """Run as a long lived process, reading one request per line from stdin
+        and writing one JSON response per line to stdout. Each request is an
+        argument list, either as a JSON array or a shell style string. The
+        selected subcommand's func is called with the parsed arguments, and
+        the response is `{"ok": true, "result": ...}` or
+        `{"ok": false, "error": "..."}`. Results that aren't JSON
+        serialisable are converted with str. Anything func writes to stdout or
+        stderr is returned in the response's "output", and func calling
+        sys.exit only fails that request
+        
+        Args:
+            stdin (TextIO, optional): Request stream. Defaults to sys.stdin
+            stdout (TextIO, optional): Response stream. Defaults to sys.stdout
+            config_file (str, optional): YML config file used to fill in
+                missing arguments, read once on start up
+        """
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        contents = self._load_config(config_file)
+        for line in stdin:
+            if not line.strip():
+                continue
+            response = self._handle_request(line, contents)
+            stdout.write(json.dumps(response, default=str) + "\n")
+            stdout.flush()
+
+    def serve_unix_socket(self, path: str, config_file: str = None):
+        """Serve requests, as in serve, over a Unix socket at path. Each
+        connection can send any number of requests. Runs until interrupted
+        
+        Args:
+            path (str): Path of the socket to create
+            config_file (str, optional): YML config file used to fill in
+                missing arguments, read once on start up
+        """
+        import os
+        import socketserver
+
+        doccli_parser = self
+        contents = self._load_config(config_file)
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    line = line.decode("utf-8")
+                    if not line.strip():
+                        continue
+                    response = doccli_parser._handle_request(line, contents)
+                    self.wfile.write(
+                        (json.dumps(response, default=str) + "\n").encode("utf-8")
+                    )
+
+        with socketserver.UnixStreamServer(path, Handler) as server:
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(path)
 
     def add_subcommand(self, cls, func=None):
         """Parses a class and adds it as a subcommand
@@ -113,23 +350,86 @@ class DocCliParser:
             func: Default function used by argparse for this function
         """
 
-        if not self.spec.get("subcommands"):
-            self.spec["subcommands"] = {
+        if not self._spec.get("subcommands"):
+            self._spec["subcommands"] = {
                 "title": "Positional Arguments",
-                "description": f"Run {self.spec['prog']} <arg> --help for further details",
+                "description": f"Run {self._spec['prog']} <arg> --help for further details",
                 "commands": [],
             }
 
-        sub_spec = self.create_decli_spec(cls)
-        sub_spec["name"] = sub_spec.pop("prog")
-        sub_spec["help"] = sub_spec.pop("description")
-        if func:
-            sub_spec["func"] = func
-
-        self.spec["subcommands"]["commands"].append(sub_spec)
+        name = self._get_command_name(cls)
+        self._subcmd_classes[name] = (cls, func)
+        self._subcmd_specs.pop(name, None)
+        self._subcmd_parsers.pop(name, None)
+        self._spec_complete = False
+        self._parser = None
 
         config_name = None if not issubclass(cls, ConfigUtil) else cls.config_key
-        self._subcmd_config_map[sub_spec["name"]] = config_name or sub_spec["name"]
+        self._subcmd_config_map[name] = config_name or name
+
+    @staticmethod
+    def _get_command_name(kls) -> str:
+        command_name = getattr(kls, "command_name", kls.__name__)
+        if not re.match(r"^[A-Za-z0-9-_]+$", command_name):
+            command_name = kls.__name__
+        return command_name
+
+    def completion_spec(self) -> Dict:
+        """JSON serialisable summary of the subcommands, options and option
+        value hints of this CLI, used to generate shell completion
+
+        Returns:
+            Dict: Completion spec
+        """
+        spec = {
+            "prog": self._spec["prog"],
+            "options": self._get_completion_options(self._cls),
+        }
+        if self._subcmd_classes:
+            spec["subcommands"] = {
+                name: {"options": self._get_completion_options(cls)}
+                for name, (cls, _) in self._subcmd_classes.items()
+            }
+        return spec
+
+    def completion_script(self, shell: str = "bash", prog: str = None) -> str:
+        """Generate a bash or zsh completion script for this CLI. The script
+        has every subcommand and option built in, so completing doesn't start
+        Python or import the CLI's modules. Regenerate it when the CLI changes
+        
+        Args:
+            shell (str): "bash" or "zsh"
+            prog (str, optional): Name of the installed executable. Defaults to
+                the command name of the main class
+
+        Returns:
+            str: Script to source in the shell
+        """
+        from .completion import completion_script
+
+        return completion_script(self.completion_spec(), shell=shell, prog=prog)
+
+    @staticmethod
+    def _get_completion_options(kls) -> Dict[str, Optional[Dict]]:
+        from .completion import value_hint
+
+        return {
+            DocCliParser._get_option_name(p): value_hint(p.annotation)
+            for p in DocCliParser._get_cli_params(kls)
+        }
+
+    @staticmethod
+    def _get_cli_params(kls) -> List["inspect.Parameter"]:
+        return [
+            p
+            for p in _get_parameters(kls)
+            if not p.name.startswith("_")
+            and p.name not in ["self", "cls", "args", "kwargs"]
+        ]
+
+    @staticmethod
+    def _get_option_name(p: "inspect.Parameter") -> str:
+        return f"--{p.name.replace('_', '-')}"
 
     @staticmethod
     def create_decli_spec(kls):
@@ -163,34 +463,22 @@ class DocCliParser:
             desc = ""
             docstr_params = {}
 
-        if hasattr(kls, "command_name"):
-            command_name = kls.command_name
-        else:
-            command_name = kls.__name__
-        class_sig = inspect.signature(kls)
-        params = class_sig.parameters
+        command_name = DocCliParser._get_command_name(kls)
         args = []
 
-        for p in params.values():
-            if not p.name.startswith("_") and p.name not in [
-                "self",
-                "cls",
-                "args",
-                "kwargs",
-            ]:
-                arg = {"name": f"--{p.name.replace('_', '-')}"}
-                if p.annotation != inspect._empty:
-                    arg["type"] = p.annotation
-                if p.default != inspect._empty:
-                    arg["default"] = p.default
-                else:
-                    arg["required"] = True
-                if docstr_params.get(p.name):
-                    arg["help"] = docstr_params.get(p.name)
-                args.append(arg)
-
-        if not re.match(r"^[A-Za-z0-9-_]+$", command_name):
-            command_name = kls.__name__
+        for p in DocCliParser._get_cli_params(kls):
+            arg = {"name": DocCliParser._get_option_name(p)}
+            if p.annotation != p.empty:
+                converter = get_converter(p.annotation)
+                if converter is not _identity:
+                    arg["type"] = converter
+            if p.default != p.empty:
+                arg["default"] = p.default
+            else:
+                arg["required"] = True
+            if docstr_params.get(p.name):
+                arg["help"] = docstr_params.get(p.name)
+            args.append(arg)
 
         spec = {"prog": command_name, "description": desc}
 
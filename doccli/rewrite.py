@@ -0,0 +1,187 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .loader import IncludeError
+
+
+def _find_mapping_node(k: str, node: yaml.Node) -> Optional[yaml.MappingNode]:
+    """Node equivalent of ConfigUtil._get_sub_dict_by_key"""
+    if not isinstance(node, yaml.MappingNode):
+        return None
+    if any(key.value == k for key, _ in node.value):
+        return node
+    for _, val in node.value:
+        sub_node = _find_mapping_node(k, val)
+        if sub_node is not None:
+            return sub_node
+    return None
+
+
+def _node_end(node: yaml.Node) -> int:
+    """Index just after the last character of a node. The end marks of block
+    collections include any trailing comments and blank lines, so use the end
+    of their last item instead"""
+    if isinstance(node, yaml.MappingNode) and node.value and not node.flow_style:
+        return _node_end(node.value[-1][1])
+    if isinstance(node, yaml.SequenceNode) and node.value and not node.flow_style:
+        return _node_end(node.value[-1])
+    return node.end_mark.index
+
+
+def _has_include(node: yaml.Node) -> bool:
+    if node.tag == "!include":
+        return True
+    if isinstance(node, yaml.MappingNode):
+        return any(_has_include(v) for _, v in node.value)
+    if isinstance(node, yaml.SequenceNode):
+        return any(_has_include(v) for v in node.value)
+    return False
+
+
+def _render_entry(key: str, value: Any, column: int, newline: str) -> str:
+    lines = yaml.safe_dump({key: value}, default_flow_style=False).splitlines()
+    return (newline + " " * column).join(lines)
+
+
+def _strip_line_breaks(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1] in "\r\n":
+        end -= 1
+    return end
+
+
+def _line_end(text: str, index: int) -> int:
+    """Index just after the line break ending the line that holds index, or
+    the end of text if that line has no line break"""
+    line_break = text.find("\n", index)
+    return len(text) if line_break == -1 else line_break + 1
+
+
+def _line_start(text: str, index: int) -> int:
+    return text.rfind("\n", 0, index) + 1
+
+
+def _is_block_mapping(text: str, node: yaml.Node) -> bool:
+    """Whether node is a non empty block mapping with every key on its own
+    line, so that its entries can be edited line by line"""
+    if not isinstance(node, yaml.MappingNode) or node.flow_style or not node.value:
+        return False
+    return all(
+        not text[_line_start(text, k.start_mark.index) : k.start_mark.index].strip()
+        for k, _ in node.value
+    )
+
+
+def _check_include(filename: str, key: str, node: yaml.Node):
+    if _has_include(node):
+        raise IncludeError(
+            f"`{key}` in `{filename}` uses !include, write to the included "
+            "file instead"
+        )
+
+
+def _edit_mapping(
+    text: str,
+    mapping: yaml.MappingNode,
+    values: Dict,
+    newline: str,
+    filename: str,
+    edits: List[Tuple[int, int, str, int]],
+    depth: int = 0,
+):
+    """Add the edits that write values into mapping. Values that are dicts
+    are written entry by entry into existing block mappings, so comments stay
+    on the lines of their entries. Below the top level, entries that aren't in
+    values are removed, as the mapping is replaced by values"""
+    column = mapping.value[0][0].start_mark.column
+    entries = {k.value: (k, v) for k, v in mapping.value}
+    # New entries go after the line holding the last entry, and its comment
+    insert_at = _line_end(text, _strip_line_breaks(text, 0, _node_end(mapping)))
+
+    for entry_key, value in values.items():
+        rendered = _render_entry(entry_key, value, column, newline)
+        if entry_key not in entries:
+            if insert_at == len(text) and not text.endswith("\n"):
+                rendered = newline + " " * column + rendered
+            else:
+                rendered = " " * column + rendered + newline
+            edits.append((insert_at, insert_at, rendered, depth))
+            continue
+
+        key_node, value_node = entries[entry_key]
+        if isinstance(value, dict) and value and _is_block_mapping(text, value_node):
+            _edit_mapping(text, value_node, value, newline, filename, edits, depth + 1)
+            continue
+        start = key_node.start_mark.index
+        end = _strip_line_breaks(text, start, _node_end(value_node))
+        if text[start:end] != rendered:
+            _check_include(filename, entry_key, value_node)
+            edits.append((start, end, rendered, depth))
+
+    if depth == 0:
+        return
+    for entry_key, (key_node, value_node) in entries.items():
+        if entry_key not in values:
+            _check_include(filename, entry_key, value_node)
+            start = key_node.start_mark.index
+            end = _strip_line_breaks(text, start, _node_end(value_node))
+            edits.append((_line_start(text, start), _line_end(text, end), "", depth))
+
+
+def update_section_in_place(filename: str, key: str, config_dict: Dict) -> bool:
+    """Write config_dict into the mapping that contains key, only replacing the
+    text of the entries that changed. Every other character of the file,
+    including comments, formatting and line endings, is left as it is. Sections
+    are updated entry by entry, so a comment stays on the line of its entry,
+    and new entries are added after the section's last line.
+
+    Only the changed entries are re-rendered, but the whole file is still
+    composed (parsed without constructing any values) to find them, and
+    written back, so the cost of a write grows with the size of the file.
+
+    Args:
+        filename (str): Path to YML config file
+        key (str): Config key used to find the mapping to update
+        config_dict (Dict): Entries to write to the mapping
+
+    Raises:
+        IncludeError: If an entry being replaced contains `!include`
+
+    Returns:
+        bool: False if the file couldn't be updated in place, e.g. because the
+            mapping uses flow style, in which case the file is not modified
+    """
+    # Read and write without newline translation, so that CRLF files keep
+    # their line endings
+    with open(filename, "r", newline="") as f:
+        text = f.read()
+    newline = "\r\n" if "\r\n" in text else "\n"
+
+    root = yaml.compose(text)
+    if root is None:
+        return False
+    mapping = _find_mapping_node(key, root)
+    if mapping is None:
+        mapping = root
+    if not isinstance(mapping, yaml.MappingNode) or mapping.flow_style:
+        return False
+    if not mapping.value:
+        return False
+
+    edits: List[Tuple[int, int, str, int]] = []
+    _edit_mapping(text, mapping, config_dict, newline, filename, edits)
+
+    # Apply from the end of the file so that earlier indexes stay valid. Inserts
+    # at the same position end up with the deepest first, then in order
+    order = sorted(
+        range(len(edits)),
+        key=lambda i: (edits[i][0], -edits[i][3], i),
+        reverse=True,
+    )
+    for i in order:
+        start, end, rendered, _ = edits[i]
+        text = text[:start] + rendered + text[end:]
+
+    with open(filename, "w", newline="") as f:
+        f.write(text)
+    return True
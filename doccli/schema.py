@@ -0,0 +1,375 @@
+import copy
+import functools
+import inspect
+import logging
+import os
+import types
+import typing
+from typing import Any, Callable, Dict, Iterable, List
+
+from docstring_parser import parse
+
+from .convert import get_param_converters
+from .loader import load_config_file
+
+JSON_SCHEMA_DIALECT = "https://json-schema.org/draft/2020-12/schema"
+
+_SCALAR_SCHEMAS = {
+    bool: {"type": "boolean"},
+    int: {"type": "integer"},
+    float: {"type": "number"},
+    str: {"type": "string"},
+    type(None): {"type": "null"},
+}
+
+
+def annotation_schema(annotation: Any) -> Dict:
+    """Convert a type annotation into a JSON Schema. Annotations that
+    have no JSON equivalent accept any value
+
+    Args:
+        annotation (Any): Type annotation
+
+    Returns:
+        Dict: JSON Schema
+    """
+    if annotation in _SCALAR_SCHEMAS:
+        return dict(_SCALAR_SCHEMAS[annotation])
+
+    origin = typing.get_origin(annotation) or annotation
+    args = typing.get_args(annotation)
+
+    if origin in (typing.Union, types.UnionType):
+        return {"anyOf": [annotation_schema(a) for a in args]}
+    if origin in (list, set, frozenset):
+        schema = {"type": "array"}
+        if args:
+            schema["items"] = annotation_schema(args[0])
+        if origin is not list:
+            schema["uniqueItems"] = True
+        return schema
+    if origin is tuple:
+        schema = {"type": "array"}
+        if args and args[-1] is Ellipsis:
+            schema["items"] = annotation_schema(args[0])
+        elif args:
+            schema["prefixItems"] = [annotation_schema(a) for a in args]
+            schema["minItems"] = schema["maxItems"] = len(args)
+        return schema
+    if origin is dict:
+        schema = {"type": "object"}
+        if args:
+            schema["additionalProperties"] = annotation_schema(args[1])
+        return schema
+    return {}
+
+
+def _param_descriptions(kls) -> Dict[str, str]:
+    try:
+        parsed_docstr = parse(kls.__doc__ or kls.__init__.__doc__)
+        return {p.arg_name: p.description.strip() for p in parsed_docstr.params}
+    except Exception:
+        logging.debug(f"Unable to parse docstring for class `{kls.__name__}`")
+        return {}
+
+
+def _section_schema(kls) -> Dict:
+    descriptions = _param_descriptions(kls)
+    properties = {}
+    required = []
+    additional = False
+
+    for p in inspect.signature(kls).parameters.values():
+        if p.kind == p.VAR_KEYWORD:
+            additional = True
+        if p.name.startswith("_") or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD):
+            continue
+
+        prop = {}
+        if p.annotation is not inspect._empty:
+            prop = annotation_schema(p.annotation)
+            if p.default is None and prop:
+                prop = {"anyOf": [prop, {"type": "null"}]}
+        if p.default is inspect._empty:
+            required.append(p.name)
+        elif isinstance(p.default, (bool, int, float, str, type(None))):
+            prop["default"] = p.default
+        if descriptions.get(p.name):
+            prop["description"] = descriptions[p.name]
+        properties[p.name] = prop
+
+    schema = {
+        "type": "object",
+        "properties": properties,
+        "additionalProperties": additional,
+    }
+    if required:
+        schema["required"] = required
+    return schema
+
+
+def _needs_section(kls) -> bool:
+    """Whether with_config_dict fails without kls's section, because kls or
+    one of its sub configs has a required config parameter"""
+    for p in inspect.signature(kls).parameters.values():
+        if (
+            p.default is inspect._empty
+            and not p.name.startswith("_")
+            and p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)
+        ):
+            return True
+    return any(_needs_section(sub) for sub in kls.sub_config_list)
+
+
+def _document_properties(kls, required: List[str]) -> Dict[str, Dict]:
+    """Properties for kls's section, and its flattened sub config sections.
+    Keys of sub config sections that must be present are appended to the
+    required list of the object holding them"""
+    section = _section_schema(kls)
+    properties = {kls.get_config_key(): section}
+    if kls.flatten_sub_configs:
+        sub_properties, sub_required = properties, required
+    else:
+        sub_properties, sub_required = section["properties"], []
+
+    for sub in kls.sub_config_list:
+        sub_properties.update(_document_properties(sub, sub_required))
+        if _needs_section(sub):
+            sub_required.append(sub.get_config_key())
+
+    if sub_required and not kls.flatten_sub_configs:
+        section["required"] = section.get("required", []) + sub_required
+    return properties
+
+
+@functools.lru_cache(maxsize=None)
+def _build_schema(kls) -> Dict:
+    required = []
+    schema = {
+        "$schema": JSON_SCHEMA_DIALECT,
+        "title": kls.__name__,
+        "type": "object",
+        "properties": _document_properties(kls, required),
+    }
+    if required:
+        schema["required"] = required
+    return schema
+
+
+def build_schema(kls) -> Dict:
+    """Build a JSON Schema for the config dict of a ConfigUtil class, laid out
+    the same way as to_config_dict, including its sub_config_list tree.
+    Schemas are built once per class
+
+    Args:
+        kls (class): ConfigUtil class
+
+    Returns:
+        Dict: JSON Schema
+    """
+    return copy.deepcopy(_build_schema(kls))
+
+
+_TYPE_CHECKS = {
+    "null": lambda v: v is None,
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "string": lambda v: isinstance(v, str),
+    "array": lambda v: isinstance(v, (list, tuple, set, frozenset)),
+    "object": lambda v: isinstance(v, dict),
+}
+
+
+def _type_name(value: Any) -> str:
+    for name, check in _TYPE_CHECKS.items():
+        if check(value):
+            return name
+    return type(value).__name__
+
+
+def compile_validator(schema: Dict) -> Callable[[Any], List[str]]:
+    """Compile the subset of JSON Schema produced by build_schema into a
+    function that returns a list of errors for a value. Each error is prefixed
+    with the path to the offending value
+
+    Args:
+        schema (Dict): JSON Schema
+
+    Returns:
+        Callable[[Any], List[str]]: Validator
+    """
+    check = _compile(schema)
+
+    def validate(value: Any) -> List[str]:
+        errors = []
+        check(value, "", errors)
+        return errors
+
+    return validate
+
+
+def _compile(schema: Dict) -> Callable[[Any, str, List[str]], None]:
+    checks = []
+
+    if "type" in schema:
+        type_check = _TYPE_CHECKS[schema["type"]]
+        expected = schema["type"]
+    else:
+        type_check = None
+
+    if "anyOf" in schema:
+        options = [_compile(s) for s in schema["anyOf"]]
+
+        def check_any_of(value, path, errors):
+            for option in options:
+                option_errors = []
+                option(value, path, option_errors)
+                if not option_errors:
+                    return
+            errors.append(f"{path or '/'}: {value!r} doesn't match any allowed type")
+
+        checks.append(check_any_of)
+
+    if "properties" in schema or "additionalProperties" in schema:
+        properties = {k: _compile(v) for k, v in schema.get("properties", {}).items()}
+        required = schema.get("required", [])
+        additional = schema.get("additionalProperties", True)
+        additional_check = (
+            _compile(additional) if isinstance(additional, dict) else None
+        )
+
+        def check_object(value, path, errors):
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path or '/'}: missing required property `{name}`")
+            for name, item in value.items():
+                item_path = f"{path}/{name}"
+                if name in properties:
+                    properties[name](item, item_path, errors)
+                elif additional_check:
+                    additional_check(item, item_path, errors)
+                elif additional is False:
+                    errors.append(f"{item_path}: unexpected property")
+
+        checks.append(check_object)
+
+    if "items" in schema or "prefixItems" in schema:
+        items = _compile(schema["items"]) if "items" in schema else None
+        prefix = [_compile(s) for s in schema.get("prefixItems", [])]
+        min_items = schema.get("minItems", 0)
+        max_items = schema.get("maxItems")
+
+        def check_array(value, path, errors):
+            if len(value) < min_items or (
+                max_items is not None and len(value) > max_items
+            ):
+                errors.append(f"{path or '/'}: wrong number of items ({len(value)})")
+                return
+            for i, item in enumerate(value):
+                validator = prefix[i] if i < len(prefix) else items
+                if validator:
+                    validator(item, f"{path}/{i}", errors)
+
+        checks.append(check_array)
+
+    if schema.get("uniqueItems"):
+
+        def check_unique(value, path, errors):
+            try:
+                unique = len(set(value)) == len(value)
+            except TypeError:  # Unhashable items
+                unique = all(value[i] not in value[:i] for i in range(len(value)))
+            if not unique:
+                errors.append(f"{path or '/'}: items are not unique")
+
+        checks.append(check_unique)
+
+    def check(value, path, errors):
+        if type_check and not type_check(value):
+            errors.append(
+                f"{path or '/'}: expected {expected}, got {_type_name(value)}"
+            )
+            return
+        for c in checks:
+            c(value, path, errors)
+
+    return check
+
+
+def _convert_document(kls, document: Dict) -> Dict:
+    """Copy of document with the values of kls's section, and its sub config
+    sections, converted as with_config_dict would convert them. Values that
+    can't be converted are kept, so that the schema reports them"""
+    document = dict(document)
+    key = kls.get_config_key()
+    section = document.get(key)
+    if isinstance(section, dict):
+        section = dict(section)
+        for name, conv in get_param_converters(kls).items():
+            if section.get(name) is not None:
+                try:
+                    section[name] = conv(section[name])
+                except (TypeError, ValueError):
+                    pass
+        document[key] = section
+
+    for sub in kls.sub_config_list:
+        if kls.flatten_sub_configs:
+            document = _convert_document(sub, document)
+        elif isinstance(document.get(key), dict):
+            document[key] = _convert_document(sub, document[key])
+    return document
+
+
+@functools.lru_cache(maxsize=None)
+def get_validator(kls) -> Callable[[Any], List[str]]:
+    """Compiled validator for the config dicts of a ConfigUtil class, cached
+    per class
+
+    Args:
+        kls (class): ConfigUtil class
+
+    Returns:
+        Callable[[Any], List[str]]: Validator
+    """
+    return compile_validator(_build_schema(kls))
+
+
+def validate_configs(kls, sources: Iterable) -> Dict[Any, List[str]]:
+    """Validate many config dicts or files against a ConfigUtil class without
+    instantiating it. As with ConfigUtil.with_config_file, the config key can
+    be nested anywhere within each document. Values are first converted to
+    their annotated types, as with_config_dict would, so a value such as "3"
+    for an int parameter is valid, but 2.9 isn't
+
+    Args:
+        kls (class): ConfigUtil class
+        sources (Iterable): Config dicts and/or paths to YML config files
+
+    Returns:
+        Dict[Any, List[str]]: Errors for each source, keyed by the file path,
+            or the position in sources for dicts. Valid sources have no errors
+    """
+    validate = get_validator(kls)
+    config_key = kls.get_config_key()
+    reports = {}
+
+    for i, source in enumerate(sources):
+        if isinstance(source, (str, os.PathLike)):
+            report_key = source
+            try:
+                source = load_config_file(source)
+            except Exception as e:
+                reports[report_key] = [f"Unable to load file: {e}"]
+                continue
+        else:
+            report_key = i
+
+        contents = kls._get_sub_dict_by_key(config_key, source)
+        if not contents:
+            reports[report_key] = [f"/: no `{config_key}` section found"]
+        else:
+            reports[report_key] = validate(_convert_document(kls, contents))
+
+    return reports
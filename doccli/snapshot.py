@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import pickle
+import struct
+from typing import Any, Dict, List, Tuple
+
+MAGIC = b"DCSNAP"
+FORMAT_VERSION = 1
+
+# magic, format version, metadata length
+_HEADER = struct.Struct(">6sHI")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot can't be used"""
+
+
+class SnapshotClassError(SnapshotError):
+    """Raised when a snapshot is for a different class"""
+
+
+def _hash_file(filename: str) -> str:
+    """sha256 of a file's contents, or None if it doesn't exist"""
+    digest = hashlib.sha256()
+    try:
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _hash_kwargs(kwargs: Dict) -> str:
+    """sha256 of the repr of kwargs. Values without a stable repr never match,
+    so snapshots written with them are always treated as stale"""
+    return hashlib.sha256(repr(sorted(kwargs.items())).encode("utf-8")).hexdigest()
+
+
+def _class_path(kls) -> str:
+    return f"{kls.__module__}.{kls.__qualname__}"
+
+
+def write_snapshot(obj: Any, path: str, sources: List[str], kwargs: Dict = None):
+    """Write obj to a binary snapshot at path. The snapshot records the sha256
+    of each source file, and of the kwargs obj was loaded with, so that stale
+    snapshots can be detected. The file is replaced atomically
+
+    Args:
+        obj (Any): Object to snapshot
+        path (str): Path to snapshot file
+        sources (List[str]): Files obj was loaded from
+        kwargs (Dict, optional): Keyword arguments obj was loaded with
+    """
+    meta = json.dumps(
+        {
+            "class": _class_path(obj.__class__),
+            "sources": {s: _hash_file(s) for s in sources},
+            "kwargs": _hash_kwargs(kwargs or {}),
+        }
+    ).encode("utf-8")
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(meta)))
+        f.write(meta)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_meta(data: bytes) -> Tuple[Dict, int]:
+    """Parse the header and metadata of a snapshot
+
+    Args:
+        data (bytes): Snapshot contents
+
+    Raises:
+        SnapshotError: If data isn't a snapshot of a supported version
+
+    Returns:
+        Tuple[Dict, int]: Metadata, and the offset of the pickled payload
+    """
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Snapshot is truncated")
+    magic, version, meta_len = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Not a doccli snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+
+    offset = _HEADER.size + meta_len
+    try:
+        meta = json.loads(bytes(data[_HEADER.size : offset]))
+    except ValueError as e:
+        raise SnapshotError("Snapshot metadata is corrupt") from e
+    return meta, offset
+
+
+def snapshot_sources(path: str) -> List[str]:
+    """Source files recorded in a snapshot, or an empty list if the snapshot
+    can't be read
+
+    Args:
+        path (str): Path to snapshot file
+
+    Returns:
+        List[str]: Source files, starting with the file that was loaded
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            _, _, meta_len = _HEADER.unpack(header)
+            meta, _ = read_snapshot_meta(header + f.read(meta_len))
+        return list(meta.get("sources", {}))
+    except (OSError, struct.error, SnapshotError):
+        return []
+
+
+def read_snapshot(kls, path: str, kwargs: Dict = None) -> Any:
+    """Restore an object of class kls from a snapshot written by write_snapshot
+
+    Args:
+        kls (class): Expected class of the object
+        path (str): Path to snapshot file
+        kwargs (Dict, optional): Keyword arguments the object must have been
+            loaded with
+
+    Raises:
+        FileNotFoundError: If there is no snapshot
+        SnapshotClassError: If the snapshot is for another class
+        SnapshotError: If the snapshot is invalid, was written with other
+            kwargs, or any of its source files have changed
+
+    Returns:
+        Any: The restored object
+    """
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+
+    meta, offset = read_snapshot_meta(data)
+    if meta.get("class") != _class_path(kls):
+        raise SnapshotClassError(
+            f"Snapshot is for `{meta.get('class')}`, not `{_class_path(kls)}`"
+        )
+    if meta.get("kwargs") != _hash_kwargs(kwargs or {}):
+        raise SnapshotError("Snapshot was written with different kwargs")
+    for source, digest in meta.get("sources", {}).items():
+        if _hash_file(source) != digest:
+            raise SnapshotError(f"`{source}` has changed since the snapshot")
+
+    try:
+        return pickle.loads(data[offset:])
+    except Exception as e:
+        raise SnapshotError("Snapshot payload is corrupt") from e
@@ -0,0 +1,72 @@
+from typing import Dict, List
+
+from doccli import ConfigUtil
+
+
+class Pool(ConfigUtil):
+    config_key = "pool"
+
+    def __init__(self, size: int = 1, hosts: List[str] = None, _conn=None):
+        """Connection pool
+
+        Args:
+            size: Number of connections
+            hosts: Hosts to connect to
+        """
+        self.size = size
+        self.hosts = hosts
+        self.slots = list(range(size))  # Derived in __init__
+        self._conn = _conn
+
+
+class Cache(ConfigUtil):
+    config_key = "cache"
+
+    def __init__(self, ttl: int = 60):
+        self.ttl = ttl
+
+
+class Service(ConfigUtil):
+    config_key = "service"
+    sub_config_list = [Pool]
+
+    def __init__(
+        self,
+        name: str,
+        debug: bool = False,
+        labels: Dict[str, str] = None,
+        *args,
+        **kwargs,
+    ):
+        self.name = name
+        self.debug = debug
+        self.labels = labels
+        super().__init__(*args, **kwargs)
+
+
+class NestedService(Service):
+    flatten_sub_configs = False
+
+
+class App(ConfigUtil):
+    config_key = "app"
+    sub_config_list = [Service, Cache]
+
+    def __init__(self, env: str = "dev", *args, **kwargs):
+        self.env = env
+        super().__init__(*args, **kwargs)
+
+
+def make_app(_conn=None, **values) -> App:
+    """App tree with a web service, updated with `<section>__<field>` values,
+    e.g. make_app(pool__size=4)"""
+    config = {
+        "app": {},
+        "service": {"name": "web", "labels": {"team": "a"}},
+        "pool": {"size": 2, "hosts": ["a", "b"]},
+        "cache": {},
+    }
+    for key, val in values.items():
+        section, field = key.split("__")
+        config[section][field] = val
+    return App.with_config_dict(config, _conn=_conn)
@@ -0,0 +1,153 @@
+from typing import Dict, List, Optional, Set, Tuple, Union
+from unittest import TestCase, mock
+
+from doccli import ConfigUtil, DocCliParser
+from doccli import convert
+from doccli.convert import get_converter, register_converter
+
+
+class Worker(ConfigUtil):
+    config_key = "worker"
+
+    def __init__(
+        self,
+        ports: List[int],
+        verbose: bool = False,
+        timeout: Optional[float] = None,
+        labels: Dict[str, int] = None,
+        _handle: str = None,
+    ):
+        """Runs work
+
+        Args:
+            ports: Ports to listen on
+            verbose: Log more
+            timeout: Seconds before giving up
+            labels: Label weights
+        """
+        self.ports = ports
+        self.verbose = verbose
+        self.timeout = timeout
+        self.labels = labels
+        self._handle = _handle
+
+
+class Counter(ConfigUtil):
+    config_key = "counter"
+
+    def __init__(self, n: int = 0):
+        self.n = n
+
+
+class TestConverters(TestCase):
+    def test_scalars_are_their_own_converter(self):
+        assert get_converter(int) is int
+        assert get_converter(str) is str
+
+    def test_int_doesnt_truncate(self):
+        for conv in (get_converter(List[int]), get_converter(Tuple[int, ...])):
+            assert conv(["3", 3.0]) == type(conv(["3", 3.0]))([3, 3])
+            with self.assertRaises(ValueError):
+                conv([2.9])
+            with self.assertRaises(ValueError):
+                conv([True])
+            with self.assertRaises(ValueError):
+                conv("2.9")
+        with self.assertRaises(ValueError):
+            get_converter(Optional[int])(2.9)
+
+    def test_converters_are_cached(self):
+        assert get_converter(List[int]) is get_converter(List[int])
+        assert get_converter(Optional[bool]) is get_converter(Optional[bool])
+
+    def test_bool(self):
+        conv = get_converter(bool)
+        assert conv("False") is False
+        assert conv("yes") is True
+        assert conv(True) is True
+        with self.assertRaises(ValueError):
+            conv("maybe")
+
+    def test_optional(self):
+        conv = get_converter(Optional[int])
+        assert conv("3") == 3
+        assert conv("None") is None
+        assert conv(None) is None
+        assert get_converter(int | None)("null") is None
+
+    def test_union_keeps_native_values(self):
+        assert get_converter(Union[int, float])(2.5) == 2.5
+        assert get_converter(Union[int, float])("2.5") == 2.5
+        assert get_converter(Union[int, float])("2") == 2
+        assert get_converter(Union[str, int])(5) == 5
+        assert get_converter(Optional[Union[str, int]])(5) == 5
+
+    def test_containers(self):
+        conv = get_converter(List[int])
+        assert conv("1,2, 3") == [1, 2, 3]
+        assert conv("[1, 2]") == [1, 2]
+        assert conv([1, "2"]) == [1, 2]
+
+        assert get_converter(Set[str])("a,b,a") == {"a", "b"}
+        assert get_converter(Tuple[int, str])("1,x") == (1, "x")
+        assert get_converter(Tuple[int, ...])([1, "2"]) == (1, 2)
+        assert get_converter(list[Optional[int]])("1,none") == [1, None]
+        assert get_converter(Dict[str, int])("a=1,b=2") == {"a": 1, "b": 2}
+        assert get_converter(Dict[str, int])({"a": "1"}) == {"a": 1}
+
+    def test_register_converter(self):
+        class Celsius(float):
+            pass
+
+        with mock.patch.dict(convert._registry):
+            register_converter(Celsius, lambda v: Celsius(str(v).rstrip("C")))
+            assert get_converter(List[Celsius])("20C,21C") == [20.0, 21.0]
+        convert._cached_converter.cache_clear()
+        convert.get_param_converters.cache_clear()
+        assert Celsius not in convert._registry
+
+
+class TestConversionIntegration(TestCase):
+    def test_cli(self):
+        parser = DocCliParser(Worker)
+        args = parser.parse_args(
+            ["--ports", "80,443", "--verbose", "False", "--timeout", "2.5"]
+        )
+        assert args.ports == [80, 443]
+        assert args.verbose is False
+        assert args.timeout == 2.5
+
+    def test_config_dict(self):
+        cfg = Worker.with_config_dict(
+            {
+                "worker": {
+                    "ports": ["80", 443],
+                    "verbose": "true",
+                    "labels": {"a": "1"},
+                }
+            },
+            _handle=5,
+        )
+        assert cfg.ports == [80, 443]
+        assert cfg.verbose is True
+        assert cfg.timeout is None
+        assert cfg.labels == {"a": 1}
+        assert cfg._handle == 5  # Underscored params aren't converted
+
+    def test_config_dict_doesnt_truncate(self):
+        with self.assertRaises(ValueError):
+            Worker.with_config_dict({"worker": {"ports": [80.5]}})
+        with self.assertRaises(ValueError):
+            Counter.with_config_dict({"counter": {"n": 2.9}})
+        with self.assertRaises(ValueError):
+            Counter.with_config_dict({"counter": {"n": True}})
+        assert Counter.with_config_dict({"counter": {"n": 2.0}}).n == 2
+        assert Counter.with_config_dict({"counter": {"n": "3"}}).n == 3
+
+    def test_config_values_round_trip_through_argv(self):
+        argv = DocCliParser._insert_params_into_argv(
+            [], 0, {"--ports": [80, 443], "--verbose": False}
+        )
+        args = DocCliParser(Worker).parse_args(argv)
+        assert args.ports == [80, 443]
+        assert args.verbose is False
@@ -0,0 +1,65 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+from doccli.frozen import FrozenConfig, FrozenDict
+
+from .configs import App, make_app
+
+
+def read_pool_size(shared):
+    return os.getpid(), shared.get()["service"]["pool"].size
+
+
+class TestFreeze(TestCase):
+    def test_freeze(self):
+        frozen = make_app(_conn="connection").freeze()
+
+        assert isinstance(frozen, FrozenConfig)
+        assert frozen.env == "dev"
+        assert frozen["service"].labels == FrozenDict(team="a")
+        assert frozen["service"]["pool"].hosts == ("a", "b")
+        assert frozen.get("missing") is None
+        with self.assertRaises(AttributeError):
+            frozen["service"]["pool"]._conn
+
+    def test_immutable(self):
+        frozen = make_app().freeze()
+        with self.assertRaises(AttributeError):
+            frozen.env = "prod"
+        with self.assertRaises(AttributeError):
+            frozen["service"]["pool"].size = 5
+        with self.assertRaises(TypeError):
+            frozen["service"].labels["team"] = "b"
+
+    def test_hashable(self):
+        a, b, c = (
+            make_app().freeze(),
+            make_app().freeze(),
+            make_app(pool__size=3).freeze(),
+        )
+        assert a == b and hash(a) == hash(b)
+        assert a != c
+        assert len({a, b, c}) == 2
+
+    def test_pickle_and_thaw(self):
+        frozen = make_app(_conn="connection").freeze()
+        assert pickle.loads(pickle.dumps(frozen)) == frozen
+
+        thawed = frozen.thaw(_conn="new connection")
+        assert isinstance(thawed, App)
+        assert thawed["service"]["pool"].hosts == ["a", "b"]
+        assert thawed["service"]["pool"]._conn == "new connection"
+        assert thawed.freeze() == frozen
+
+    def test_shared_memory(self):
+        frozen = make_app().freeze()
+        with frozen.share() as shared:
+            # Only the block name is sent with each task
+            assert len(pickle.dumps(shared)) < 200
+            assert shared.get() is frozen
+
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                results = list(pool.map(read_pool_size, [shared] * 8))
+            assert {size for _, size in results} == {2}
@@ -0,0 +1,82 @@
+import subprocess
+import sys
+from typing import Dict
+from unittest import TestCase
+
+# Cumulative import time budgets, in microseconds, for the doccli modules
+# loaded by each statement. Without lazy imports these were over 100ms
+IMPORT_DOCCLI_BUDGET = 20_000
+IMPORT_CONFIG_UTIL_BUDGET = 60_000
+
+HEAVY_MODULES = [
+    "yaml",
+    "decli",
+    "docstring_parser",
+    "argparse",
+    "inspect",
+    "concurrent.futures",
+    "multiprocessing",
+]
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """Run code in a fresh interpreter with -X importtime, and return the
+    cumulative import time of every top level import"""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.rstrip()] = int(cumulative)
+    return times
+
+
+def loaded_modules(code: str):
+    res = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(res.stdout.split())
+
+
+def doccli_import_time(times: Dict[str, int]) -> int:
+    return sum(t for name, t in times.items() if name.startswith(" doccli"))
+
+
+class TestImportTime(TestCase):
+    def test_import_doccli(self):
+        times = import_times("import doccli")
+        assert doccli_import_time(times) < IMPORT_DOCCLI_BUDGET, times
+        assert not set(HEAVY_MODULES) & loaded_modules("import doccli")
+
+    def test_import_config_util(self):
+        code = "from doccli import ConfigUtil"
+        times = import_times(code)
+        assert " doccli.config" in times
+        assert doccli_import_time(times) < IMPORT_CONFIG_UTIL_BUDGET, times
+        assert not set(HEAVY_MODULES) & loaded_modules(code)
+
+    def test_config_from_dict_skips_cli_and_yaml(self):
+        code = "\n".join(
+            [
+                "from doccli import ConfigUtil",
+                "class Cfg(ConfigUtil):",
+                "    def __init__(self, a: int = 1):",
+                "        self.a = a",
+                "assert Cfg.with_config_dict({'Cfg': {'a': '2'}}).a == 2",
+            ]
+        )
+        modules = loaded_modules(code)
+        assert not {"yaml", "decli", "docstring_parser", "argparse"} & modules
+
+    def test_parser_is_still_available(self):
+        modules = loaded_modules("from doccli import DocCliParser")
+        assert {"decli", "docstring_parser", "doccli.config"} <= modules
@@ -0,0 +1,132 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from doccli import ConfigUtil, loader
+from doccli.loader import IncludeError, load_config_file
+
+
+class Db(ConfigUtil):
+    config_key = "db"
+
+    def __init__(self, host: str, port: int = 5432):
+        self.host = host
+        self.port = port
+
+
+class TestIncludes(TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        loader.clear_cache()
+        return super().setUp()
+
+    def tearDown(self):
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def _write(self, name: str, contents: str) -> str:
+        path = os.path.join(self._dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w+") as f:
+            f.write(contents)
+        return path
+
+    def test_include(self):
+        self._write("fragments/db.yml", "host: localhost\nport: 1234\n")
+        self._write("fragments/tags.yml", "- a\n- b\n")
+        root = self._write(
+            "root.yml",
+            "db: !include fragments/db.yml\ntags: !include fragments/tags.yml\n",
+        )
+
+        self.assertDictEqual(
+            load_config_file(root),
+            {"db": {"host": "localhost", "port": 1234}, "tags": ["a", "b"]},
+        )
+
+        cfg = Db.with_config_file(root)
+        assert cfg.host == "localhost"
+        assert cfg.port == 1234
+
+    def test_nested_include_relative_paths(self):
+        self._write("a/b/leaf.yml", "value: 1\n")
+        self._write("a/mid.yml", "leaf: !include b/leaf.yml\n")
+        root = self._write("root.yml", "mid: !include a/mid.yml\n")
+
+        self.assertDictEqual(load_config_file(root), {"mid": {"leaf": {"value": 1}}})
+
+    def test_shared_fragment_parsed_once(self):
+        self._write("shared.yml", "host: shared\n")
+        roots = [
+            self._write(
+                f"root{i}.yml", "a: !include shared.yml\nb: !include shared.yml\n"
+            )
+            for i in range(3)
+        ]
+
+        with mock.patch.object(loader.yaml, "load", wraps=loader.yaml.load) as load:
+            results = [load_config_file(root) for root in roots]
+            assert load.call_count == 4  # 3 roots + 1 shared fragment
+
+        # Results don't share containers, as with_config_dict mutates them
+        results[0]["a"]["host"] = "changed"
+        assert results[0]["b"]["host"] == "shared"
+        assert results[1]["a"]["host"] == "shared"
+
+    def test_modified_fragment_is_reparsed(self):
+        frag = self._write("frag.yml", "host: one\n")
+        root = self._write("root.yml", "db: !include frag.yml\n")
+        assert load_config_file(root)["db"]["host"] == "one"
+
+        self._write("frag.yml", "host: three\n")
+        os.utime(frag, ns=(0, 0))
+        assert load_config_file(root)["db"]["host"] == "three"
+
+    def test_cycle(self):
+        self._write("a.yml", "b: !include b.yml\n")
+        self._write("b.yml", "a: !include a.yml\n")
+        root = self._write("root.yml", "a: !include a.yml\n")
+
+        with self.assertRaises(IncludeError):
+            load_config_file(root)
+
+        self_ref = self._write("self.yml", "me: !include self.yml\n")
+        with self.assertRaises(IncludeError):
+            load_config_file(self_ref)
+
+    def test_missing_include(self):
+        root = self._write("root.yml", "db: !include missing.yml\n")
+
+        with self.assertRaises(IncludeError):
+            load_config_file(root)
+        with self.assertRaises(IncludeError):
+            Db.with_config_file(root)
+
+    def test_to_config_file_keeps_includes(self):
+        self._write("fragments/tags.yml", "- a\n- b\n")
+        root = self._write("root.yml", "tags: !include fragments/tags.yml\n")
+
+        Db(host="remote").to_config_file(root)
+        with open(root) as f:
+            assert "tags: !include" in f.read()
+        self.assertDictEqual(
+            load_config_file(root), {"db": {"host": "remote"}, "tags": ["a", "b"]}
+        )
+
+    def test_to_config_file_section_in_included_file(self):
+        self._write("db.yml", "db:\n  host: localhost\n")
+        root = self._write("root.yml", "service: !include db.yml\n")
+
+        with self.assertRaises(IncludeError):
+            Db(host="remote").to_config_file(root)
+        assert Db.with_config_file(root).host == "localhost"
+
+    def test_to_config_file_section_is_include(self):
+        self._write("db.yml", "host: localhost\n")
+        root = self._write("root.yml", "db: !include db.yml\n")
+
+        for in_place in (False, True):
+            with self.assertRaises(IncludeError):
+                Db(host="remote").to_config_file(root, in_place=in_place)
+            with open(root) as f:
+                assert f.read() == "db: !include db.yml\n"
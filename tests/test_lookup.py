@@ -0,0 +1,71 @@
+import pickle
+from unittest import TestCase, mock
+
+from doccli import ConfigUtil
+
+from .configs import App, make_app
+
+
+class Point(ConfigUtil):
+    config_key = "point"
+
+    def __init__(self, x: int = 0):
+        self.x = x
+
+    def __eq__(self, other):
+        return isinstance(other, Point) and self.x == other.x
+
+
+class TestLookup(TestCase):
+    def test_lookup(self):
+        app = make_app()
+        assert app.lookup("env") == "dev"
+        assert app.lookup("service.name") == "web"
+        assert app.lookup("service.pool.size") == 2
+        assert app.lookup("service.pool") is app["service"]["pool"]
+        assert app["service"].lookup("pool.hosts") == ["a", "b"]
+
+    def test_missing(self):
+        app = make_app()
+        with self.assertRaises(KeyError):
+            app.lookup("service.pool.missing")
+        with self.assertRaises(KeyError):
+            app.lookup("service.pool._conn")
+        assert app.lookup("nope", missing=None) is None
+
+    def test_index_is_built_once(self):
+        app = make_app()
+        with mock.patch.object(
+            App, "_build_path_index", wraps=app._build_path_index
+        ) as build:
+            for _ in range(3):
+                app.lookup("service.pool.size")
+            assert build.call_count == 1
+
+    def test_mutation_invalidates_index(self):
+        app = make_app()
+        service = app["service"]
+        assert app.lookup("service.pool.size") == 2
+        assert service.lookup("pool.size") == 2
+
+        app["service"]["pool"].size = 20
+        assert app.lookup("service.pool.size") == 20
+        assert service.lookup("pool.size") == 20
+
+        app.apply_patch({"app/service/pool": {"size": 30}})
+        assert app.lookup("service.pool.size") == 30
+
+    def test_index_is_not_pickled(self):
+        app = make_app()
+        app.lookup("env")
+        restored = pickle.loads(pickle.dumps(app))
+        assert "_path_index" not in vars(restored)
+        assert restored.lookup("service.pool.size") == 2
+
+    def test_unhashable_config(self):
+        point = Point.with_config_dict({"point": {"x": 1}})
+        assert point.lookup("x") == 1
+        point.x = 2
+        assert point.lookup("x") == 2
+        del point.x
+        assert point.lookup("x", missing=None) is None
@@ -1,8 +1,24 @@
 import argparse
+import enum
+import io
+import json
 import os
-from unittest import TestCase
+import pathlib
+import shutil
+import socket
+import socketserver
+import sys
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Literal
+from unittest import TestCase, mock, skipIf
+
+from decli import cli
 
 from doccli import DocCliParser, ConfigUtil
+from doccli.loader import load_config_file
 
 
 class CliTool:
@@ -184,3 +200,256 @@ class TestParseWithFile(TestCase):
         )
         # Note that CLI takes precedence over config file with param a
         assert args == ["cfg", "--param-b", "see", "--param-a", "hey"]
+
+
+class TestLazySubcommands(TestCase):
+    def _make_parser(self, n=50):
+        parser = DocCliParser(SuperTool)
+        for i in range(n):
+            kls = type(f"Cmd{i}", (CliTool,), {"command_name": f"cmd-{i}"})
+            parser.add_subcommand(kls, func=lambda **kwargs: kwargs)
+        return parser
+
+    def test_only_selected_subcommand_is_built(self):
+        parser = self._make_parser()
+        with mock.patch.object(
+            DocCliParser, "create_decli_spec", wraps=DocCliParser.create_decli_spec
+        ) as create_spec:
+            res = parser.parse_args(["cmd-7", "--param-a", "a", "--param-b", "b"])
+            assert create_spec.call_count == 1
+
+        assert res.param_a == "a"
+        assert res.func(param_a="x") == {"param_a": "x"}
+
+        # The spec still contains every subcommand
+        assert len(parser.spec["subcommands"]["commands"]) == 50
+
+    def test_top_level_help_uses_full_parser(self):
+        parser = self._make_parser(3)
+        stdout = io.StringIO()
+        with self.assertRaises(SystemExit), mock.patch("sys.stdout", stdout):
+            parser.parse_args(["--help"])
+        assert "cmd-0" in stdout.getvalue() and "cmd-2" in stdout.getvalue()
+
+    def test_find_subcommand(self):
+        parser = DocCliParser(CliTool)
+        parser.add_subcommand(SuperTool)
+
+        assert parser._find_subcommand(["main-tool"]) == "main-tool"
+        # Option values that look like subcommands are skipped
+        assert parser._find_subcommand(["--param-a", "main-tool"]) is None
+        assert parser._find_subcommand(["--param-a=x", "main-tool"]) == "main-tool"
+        assert parser._find_subcommand(["--param", "x", "main-tool"]) is None
+        assert parser._find_subcommand(["--param-c", "1", "main-tool"]) == "main-tool"
+        assert parser._find_subcommand(["-h", "main-tool"]) is None
+        assert parser._find_subcommand(["--he", "main-tool"]) is None
+        assert parser._find_subcommand(["unknown"]) is None
+
+
+class TestBatchParse(TestCase):
+    def setUp(self):
+        self.parser = DocCliParser(MainFunc)
+        self.parser.add_subcommand(
+            ConfigCmd, func=lambda param_a, param_b: f"{param_a}-{param_b}"
+        )
+        return super().setUp()
+
+    def tearDown(self):
+        try:
+            os.remove(test_file)
+        except FileNotFoundError:
+            pass
+        return super().tearDown()
+
+    def test_parse_args_with_config_file_argv(self):
+        with open(test_file, "w+") as f:
+            f.write("config-cmd.options:\n  param_b: see\n")
+
+        args = self.parser.parse_args_with_config_file(
+            test_file, ["cfg", "--param-a", "hey"]
+        )
+        assert (args.param_a, args.param_b) == ("hey", "see")
+
+    def test_parse_many(self):
+        with open(test_file, "w+") as f:
+            f.write("config-cmd.options:\n  param_b: see\n")
+
+        argvs = [["cfg", "--param-a", str(i)] for i in range(5)]
+        with mock.patch(
+            "doccli.loader.load_config_file", wraps=load_config_file
+        ) as load, mock.patch("doccli.parse.cli", wraps=cli) as build:
+            results = list(self.parser.parse_many(argvs, config_file=test_file))
+            assert load.call_count == 1
+            assert build.call_count == 1
+
+        assert [r.param_a for r in results] == ["0", "1", "2", "3", "4"]
+        assert {r.param_b for r in results} == {"see"}
+        assert argvs[0] == ["cfg", "--param-a", "0"]  # Inputs aren't modified
+
+    def test_parse_many_without_subcommands(self):
+        parser = DocCliParser(CliTool)
+        argvs = [["--param-a", str(i), "--param-b", "1"] for i in range(5)]
+        with mock.patch("doccli.parse.cli", wraps=cli) as build:
+            results = list(parser.parse_many(argvs))
+            assert build.call_count == 1
+
+        assert [r.param_a for r in results] == ["0", "1", "2", "3", "4"]
+
+    def test_serve(self):
+        requests = io.StringIO(
+            "\n".join(
+                [
+                    'cfg --param-a "a b" --param-b c',
+                    '["cfg", "--param-a", "x", "--param-b", "y"]',
+                    "",
+                    "cfg --param-a missing-b",
+                    "cfg --help",
+                ]
+            )
+        )
+        responses = io.StringIO()
+        self.parser.serve(requests, responses)
+
+        responses = [json.loads(r) for r in responses.getvalue().splitlines()]
+        assert responses[0] == {"ok": True, "result": "a b-c"}
+        assert responses[1] == {"ok": True, "result": "x-y"}
+        assert responses[2]["ok"] is False
+        assert "--param-b" in responses[2]["error"]
+        assert responses[3]["ok"] is False and "usage" in responses[3]["error"]
+        assert len(responses) == 4
+
+    def test_serve_isolates_func_output(self):
+        def run(param_a, param_b):
+            print("working")
+            if param_a == "exit":
+                sys.exit(3)
+            return param_b
+
+        parser = DocCliParser(MainFunc)
+        parser.add_subcommand(ConfigCmd, func=run)
+        requests = io.StringIO(
+            "cfg --param-a x --param-b y\ncfg --param-a exit --param-b y\n"
+        )
+        responses = io.StringIO()
+        parser.serve(requests, responses)
+
+        responses = [json.loads(r) for r in responses.getvalue().splitlines()]
+        assert responses == [
+            {"ok": True, "result": "y", "output": "working\n"},
+            {"ok": False, "error": "Exited with status 3", "output": "working\n"},
+        ]
+
+    def test_serve_unix_socket(self):
+        servers = []
+        serve_forever = socketserver.UnixStreamServer.serve_forever
+
+        def record_server(server, *args, **kwargs):
+            servers.append(server)
+            serve_forever(server, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            socketserver.UnixStreamServer, "serve_forever", record_server
+        ):
+            path = os.path.join(tmp, "doccli.sock")
+            thread = threading.Thread(
+                target=self.parser.serve_unix_socket, args=(path,), daemon=True
+            )
+            thread.start()
+            try:
+                for _ in range(100):
+                    if servers:
+                        break
+                    time.sleep(0.01)
+
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(path)
+                    sock.sendall(b"cfg --param-a a --param-b b\n")
+                    response = sock.makefile().readline()
+            finally:
+                if servers:
+                    servers[0].shutdown()
+                thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert not os.path.exists(path)
+
+        assert json.loads(response) == {"ok": True, "result": "a-b"}
+
+
+class Mode(enum.Enum):
+    FAST = "fast"
+    SAFE = "safe"
+
+
+class Deploy:
+    command_name = "deploy"
+
+    def __init__(
+        self,
+        target: pathlib.Path,
+        mode: Mode = Mode.SAFE,
+        dry_run: bool = False,
+        region: Literal["eu", "us"] = "eu",
+        retries: int = 3,
+    ):
+        self.target = target
+
+
+class TestCompletion(TestCase):
+    def _make_parser(self):
+        parser = DocCliParser(SuperTool)
+        parser.add_subcommand(CliTool)
+        parser.add_subcommand(Deploy)
+        return parser
+
+    def test_completion_spec(self):
+        spec = self._make_parser().completion_spec()
+        assert spec["prog"] == "main-tool"
+        assert spec["options"] == {}
+        self.assertDictEqual(
+            spec["subcommands"]["deploy"]["options"],
+            {
+                "--target": {"files": True},
+                "--mode": {"choices": ["fast", "safe"]},
+                "--dry-run": {"choices": ["true", "false"]},
+                "--region": {"choices": ["eu", "us"]},
+                "--retries": None,
+            },
+        )
+        assert list(spec["subcommands"]["cli"]["options"]) == [
+            "--param-a",
+            "--param-b",
+            "--param-c",
+        ]
+        json.dumps(spec)
+
+    def test_completion_doesnt_build_parsers(self):
+        parser = self._make_parser()
+        with mock.patch("doccli.parse.cli") as build:
+            parser.completion_script()
+            build.assert_not_called()
+        assert parser._subcmd_specs == {}
+
+    @skipIf(shutil.which("bash") is None, "bash is not installed")
+    def test_bash_completion(self):
+        script = self._make_parser().completion_script("bash", prog="mt")
+
+        def complete(*words):
+            cmd = (
+                f"{script}\nCOMP_WORDS=(mt {' '.join(words)}); "
+                f"COMP_CWORD={len(words)}; _doccli_mt; echo ${{COMPREPLY[@]}}"
+            )
+            res = subprocess.run(["bash", "-c", cmd], capture_output=True, text=True)
+            return res.stdout.split()
+
+        assert complete("") == ["-h", "--help", "cli", "deploy"]
+        assert complete("d") == ["deploy"]
+        assert complete("deploy", "--d") == ["--dry-run"]
+        assert complete("deploy", "--mode", "") == ["fast", "safe"]
+        assert complete("deploy", "--dry-run", "f") == ["false"]
+        assert complete("cli", "--param-") == ["--param-a", "--param-b", "--param-c"]
+
+    def test_zsh_completion(self):
+        script = self._make_parser().completion_script("zsh")
+        assert script.startswith("autoload -U +X bashcompinit && bashcompinit")
+        assert script.rstrip().endswith("complete -F _doccli_main_tool main-tool")
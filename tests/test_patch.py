@@ -0,0 +1,56 @@
+import json
+from unittest import TestCase
+
+from doccli import ConfigUtil
+
+from .configs import Pool, make_app
+
+
+class TestDiffPatch(TestCase):
+    def test_diff(self):
+        old = make_app()
+        new = make_app(pool__size=4, service__debug=True)
+
+        patch = ConfigUtil.diff(old, new)
+        assert patch == {
+            "app/service": {"debug": True},
+            "app/service/pool": {"size": 4},
+        }
+        assert ConfigUtil.diff(old, make_app()) == {}
+        # Patches are small enough to be sent as JSON
+        assert json.loads(json.dumps(patch)) == patch
+
+    def test_diff_different_classes(self):
+        with self.assertRaises(ValueError):
+            ConfigUtil.diff(make_app(), Pool())
+
+    def test_apply_patch(self):
+        live = make_app()
+        service, cache = live["service"], live["cache"]
+        pool = service["pool"]
+        pool._conn = "connection"
+
+        live.apply_patch(
+            {"app/service": {"debug": True}, "app/service/pool": {"size": 4}}
+        )
+
+        assert service.debug is True and service.name == "web"
+        # Objects are updated in place, and untouched sub configs are kept
+        assert live["service"] is service and service["pool"] is pool
+        assert live["cache"] is cache
+        assert pool.size == 4 and pool.slots == [0, 1, 2, 3]
+        assert pool._conn == "connection"
+        assert cache.ttl == 60
+
+        assert ConfigUtil.diff(live, make_app(pool__size=4, service__debug=True)) == {}
+
+    def test_apply_patch_only_reinitialises_patched_configs(self):
+        live = make_app()
+        live["cache"].ttl = 5  # Not re-initialised, so this is kept
+        live.apply_patch({"app/service/pool": {"size": 3}})
+        assert live["cache"].ttl == 5
+        assert live["service"]["pool"].slots == [0, 1, 2]
+
+    def test_apply_unknown_path(self):
+        with self.assertRaises(KeyError):
+            make_app().apply_patch({"app/service/other": {"size": 3}})
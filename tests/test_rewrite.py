@@ -0,0 +1,110 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import yaml
+
+from .configs import NestedService, Pool
+
+CONTENTS = """# Shared config, edited by hand
+other:   {b: 2, a: 1}  # flow style, unsorted
+
+deploy:
+  service:
+    name: web
+    pool:
+      size: 2   # tuned
+  # trailing comment
+zzz_last: |
+  keep
+  me
+"""
+
+
+class TestInPlaceWrite(TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self._dir.name, "config.yml")
+        with open(self.filename, "w+") as f:
+            f.write(CONTENTS)
+        return super().setUp()
+
+    def tearDown(self):
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def _read(self):
+        with open(self.filename) as f:
+            return f.read()
+
+    def test_only_section_is_rewritten(self):
+        cfg = NestedService.with_config_file(self.filename)
+        cfg["pool"].size = 8
+        cfg["pool"].hosts = ["a", "b"]
+        cfg.to_config_file(self.filename, in_place=True)
+
+        # Comments stay on the line of their entry, and new entries go after it
+        assert self._read() == CONTENTS.replace(
+            "      size: 2   # tuned\n",
+            "      size: 8   # tuned\n      hosts:\n      - a\n      - b\n",
+        )
+        assert NestedService.with_config_file(self.filename)["pool"].hosts == ["a", "b"]
+
+    def test_sub_config_written_in_place(self):
+        cfg = Pool.with_config_file(self.filename)
+        cfg.size = 3
+        cfg.to_config_file(self.filename, in_place=True)
+
+        assert self._read() == CONTENTS.replace("size: 2", "size: 3")
+
+    def test_crlf_line_endings_are_kept(self):
+        with open(self.filename, "wb") as f:
+            f.write(b"# hdr\r\nother: 1\r\npool:\r\n  size: 2\r\nlast: 3\r\n")
+        cfg = Pool(size=5, hosts=["a"])
+        cfg.to_config_file(self.filename, in_place=True)
+
+        with open(self.filename, "rb") as f:
+            assert f.read() == (
+                b"# hdr\r\nother: 1\r\npool:\r\n  size: 5\r\n  hosts:\r\n"
+                b"  - a\r\nlast: 3\r\n"
+            )
+
+    def test_new_section_is_appended(self):
+        with open(self.filename, "w+") as f:
+            f.write("# header\nfirst: 1\n\n# footer\n")
+        Pool(size=4).to_config_file(self.filename, in_place=True)
+
+        assert self._read() == "# header\nfirst: 1\npool:\n  size: 4\n\n# footer\n"
+
+    def test_new_section_after_commented_entry(self):
+        with open(self.filename, "w+") as f:
+            f.write("a: 1  # c\n\n# end\n")
+        Pool(size=5).to_config_file(self.filename, in_place=True)
+
+        assert self._read() == "a: 1  # c\npool:\n  size: 5\n\n# end\n"
+
+    def test_entries_keep_their_comments(self):
+        with open(self.filename, "w+") as f:
+            f.write("pool:\n  size: 2  # tuned\n  hosts:\n  - a  # primary\n# end\n")
+        Pool(size=3).to_config_file(self.filename, in_place=True)
+
+        # hosts is back to its default, so it's removed with its comment
+        assert self._read() == "pool:\n  size: 3  # tuned\n# end\n"
+
+        Pool(size=3, hosts=["b"]).to_config_file(self.filename, in_place=True)
+        assert self._read() == "pool:\n  size: 3  # tuned\n  hosts:\n  - b\n# end\n"
+
+    def test_falls_back_for_flow_style(self):
+        with open(self.filename, "w+") as f:
+            f.write("pool: {size: 1}\n")
+        Pool(size=4).to_config_file(self.filename, in_place=True)
+
+        with open(self.filename) as f:
+            assert yaml.safe_load(f) == {"pool": {"size": 4}}
+
+    def test_missing_file(self):
+        os.remove(self.filename)
+        Pool(size=4).to_config_file(self.filename, in_place=True)
+
+        with open(self.filename) as f:
+            assert yaml.safe_load(f) == {"pool": {"size": 4}}
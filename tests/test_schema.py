@@ -0,0 +1,135 @@
+import os
+import tempfile
+from typing import Dict, List, Optional
+from unittest import TestCase
+
+import yaml
+
+from doccli.schema import annotation_schema, compile_validator, get_validator
+
+from .configs import App, NestedService, Pool
+
+
+class TestSchema(TestCase):
+    def test_annotation_schema(self):
+        assert annotation_schema(int) == {"type": "integer"}
+        assert annotation_schema(Optional[str]) == {
+            "anyOf": [{"type": "string"}, {"type": "null"}]
+        }
+        assert annotation_schema(Dict[str, List[float]]) == {
+            "type": "object",
+            "additionalProperties": {"type": "array", "items": {"type": "number"}},
+        }
+        assert annotation_schema(object) == {}
+
+    def test_class_schema(self):
+        schema = NestedService.json_schema()
+        service = schema["properties"]["service"]
+
+        assert service["required"] == ["name"]
+        assert service["additionalProperties"] is True  # **kwargs
+        assert service["properties"]["debug"] == {"type": "boolean", "default": False}
+
+        pool = service["properties"]["pool"]
+        self.assertDictEqual(
+            pool,
+            {
+                "type": "object",
+                "properties": {
+                    "size": {
+                        "type": "integer",
+                        "default": 1,
+                        "description": "Number of connections",
+                    },
+                    "hosts": {
+                        "anyOf": [
+                            {"type": "array", "items": {"type": "string"}},
+                            {"type": "null"},
+                        ],
+                        "default": None,
+                        "description": "Hosts to connect to",
+                    },
+                },
+                "additionalProperties": False,
+            },
+        )
+
+        # Callers can't modify the cached schema
+        schema["properties"].clear()
+        assert NestedService.json_schema()["properties"]
+
+    def test_validator_is_compiled_once(self):
+        assert get_validator(NestedService) is get_validator(NestedService)
+
+    def test_validate(self):
+        validate = compile_validator(Pool.json_schema())
+        assert validate({"pool": {"size": 3, "hosts": ["a"]}}) == []
+        assert validate({"pool": {"size": True, "hosts": ["a", 1], "other": 1}}) == [
+            "/pool/size: expected integer, got boolean",
+            "/pool/hosts: ['a', 1] doesn't match any allowed type",
+            "/pool/other: unexpected property",
+        ]
+        assert validate([]) == ["/: expected object, got array"]
+
+    def test_validate_configs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            good = os.path.join(tmp, "good.yml")
+            bad = os.path.join(tmp, "bad.yml")
+            with open(good, "w+") as f:
+                yaml.safe_dump({"service": {"name": "a", "pool": {"size": 1}}}, f)
+            with open(bad, "w+") as f:
+                yaml.safe_dump({"outer": {"service": {"pool": {"size": "one"}}}}, f)
+
+            reports = NestedService.validate_configs(
+                [good, bad, os.path.join(tmp, "missing.yml"), {"other": {}}]
+            )
+
+        assert reports[good] == []
+        assert reports[bad] == [
+            "/service: missing required property `name`",
+            "/service/pool/size: expected integer, got string",
+        ]
+        assert reports[os.path.join(tmp, "missing.yml")][0].startswith(
+            "Unable to load file"
+        )
+        assert reports[3] == ["/: no `service` section found"]
+
+    def test_validate_configs_agrees_with_loading(self):
+        config = {"service": {"name": "a", "debug": "yes", "pool": {"size": "3"}}}
+        assert NestedService.validate_configs([config]) == {0: []}
+        assert NestedService.with_config_dict(config)["pool"].size == 3
+
+        config = {"service": {"name": "a", "pool": {"size": 2.9}}}
+        assert NestedService.validate_configs([config]) == {
+            0: ["/service/pool/size: expected integer, got number"]
+        }
+        config = {"service": {"name": "a", "pool": {"size": True}}}
+        assert NestedService.validate_configs([config]) == {
+            0: ["/service/pool/size: expected integer, got boolean"]
+        }
+        with self.assertRaises(ValueError):
+            NestedService.with_config_dict(config)
+
+    def test_required_sub_config_sections(self):
+        # Service has a required parameter, so its section must be present.
+        # Cache doesn't, so it can be left out
+        assert App.json_schema()["required"] == ["service"]
+        assert App.validate_configs([{"app": {}}]) == {
+            0: ["/: missing required property `service`"]
+        }
+        with self.assertRaises(TypeError):
+            App.with_config_dict({"app": {}})
+
+        config = {"app": {}, "service": {"name": "web"}}
+        assert App.validate_configs([config]) == {0: []}
+        App.with_config_dict(config)
+
+        class NestedApp(App):
+            flatten_sub_configs = False
+
+        schema = NestedApp.json_schema()
+        assert "required" not in schema
+        assert schema["properties"]["app"]["required"] == ["service"]
+        assert NestedApp.validate_configs([{"app": {"cache": {}}}]) == {
+            0: ["/app: missing required property `service`"]
+        }
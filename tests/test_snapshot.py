@@ -0,0 +1,87 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import yaml
+
+from doccli.snapshot import SnapshotClassError, SnapshotError
+
+from .configs import Pool, Service
+
+
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self._dir.name, "config.yml")
+        self.fragment = os.path.join(self._dir.name, "pool.yml")
+        self.snapshot = os.path.join(self._dir.name, "config.snap")
+
+        with open(self.fragment, "w+") as f:
+            yaml.safe_dump({"size": 4}, f)
+        with open(self.config_file, "w+") as f:
+            f.write("service:\n  name: web\npool: !include pool.yml\n")
+        return super().setUp()
+
+    def tearDown(self):
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def test_round_trip(self):
+        Service.with_config_file(self.config_file).to_snapshot(self.snapshot)
+
+        with mock.patch.object(Service, "with_config_file") as with_config_file:
+            restored = Service.from_snapshot(self.snapshot)
+            with_config_file.assert_not_called()
+
+        assert restored.name == "web"
+        assert restored["pool"].size == 4
+
+    def test_changed_source_falls_back_to_yaml(self):
+        Service.with_config_file(self.config_file).to_snapshot(self.snapshot)
+
+        with open(self.fragment, "w+") as f:
+            yaml.safe_dump({"size": 8}, f)
+
+        restored = Service.from_snapshot(self.snapshot)
+        assert restored["pool"].size == 8
+
+        # The snapshot was refreshed, so the next load doesn't need the YAML
+        with mock.patch.object(Service, "with_config_file") as with_config_file:
+            assert Service.from_snapshot(self.snapshot)["pool"].size == 8
+            with_config_file.assert_not_called()
+
+    def test_missing_or_corrupt_snapshot(self):
+        restored = Service.from_snapshot(self.snapshot, filename=self.config_file)
+        assert restored.name == "web"
+        assert os.path.exists(self.snapshot)
+
+        with open(self.snapshot, "wb") as f:
+            f.write(b"not a snapshot")
+        restored = Service.from_snapshot(self.snapshot, filename=self.config_file)
+        assert restored.name == "web"
+
+        with open(self.snapshot, "wb") as f:
+            f.write(b"not a snapshot")
+        with self.assertRaises(SnapshotError):
+            Service.from_snapshot(self.snapshot)
+
+    def test_kwargs_are_part_of_the_snapshot(self):
+        Service.with_config_file(self.config_file, name="api").to_snapshot(
+            self.snapshot
+        )
+        assert Service.from_snapshot(self.snapshot, name="api").name == "api"
+
+        # Different kwargs make the snapshot stale
+        assert Service.from_snapshot(self.snapshot, name="db").name == "db"
+        assert Service.from_snapshot(self.snapshot).name == "web"
+
+    def test_wrong_class(self):
+        Service.with_config_file(self.config_file).to_snapshot(self.snapshot)
+
+        with self.assertRaises(SnapshotClassError):
+            Pool.from_snapshot(self.snapshot)
+
+        # The other class's snapshot is left alone
+        with mock.patch.object(Service, "with_config_file") as with_config_file:
+            assert Service.from_snapshot(self.snapshot).name == "web"
+            with_config_file.assert_not_called()